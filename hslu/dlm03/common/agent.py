@@ -1,6 +1,7 @@
 """Provides an agent abstraction."""
 
-import random
+import asyncio
+import operator
 from collections.abc import Callable, Sequence
 from typing import Any
 
@@ -13,16 +14,25 @@ class Agent:
     """A class used to represent an AI Agent."""
     _backend: backend_lib.AsyncLLMBackend
     _tool_manager: tools.ToolManager
+    _stream: bool
+    _choice_strategy: Callable[[Sequence[types.Choice]], types.Choice]
 
-    def __init__(self, backend: backend_lib.AsyncLLMBackend, tool_manager: tools.ToolManager | None = None) -> None:
+    def __init__(self, backend: backend_lib.AsyncLLMBackend, tool_manager: tools.ToolManager | None = None, *,
+                 stream: bool = True,
+                 choice_strategy: Callable[[Sequence[types.Choice]], types.Choice] = operator.itemgetter(0)) -> None:
         """Initializes an `Agent` instance.
 
         Args:
-            backend: The backend to use.
+            backend: The backend to use. Its semantic cache, if any, only serves agents without tools.
             tool_manager: The tool manager to use (optional).
+            stream: Whether to stream the responses to the chat observers when no response format is required. Cached
+                responses are replayed to the observers as a single chunk.
+            choice_strategy: A callable selecting one of the response choices (the first one by default).
         """
         self._backend = backend
         self._tool_manager = tool_manager
+        self._stream = stream
+        self._choice_strategy = choice_strategy
 
     async def tools(self) -> Sequence[types.Tool]:
         """Returns the list of tools that this agent can use.
@@ -45,21 +55,50 @@ class Agent:
             A list of `types.Message` objects representing the agent's response.
         """
         tools = await self.tools()
+        if tools:
+            kwargs["tools"] = tools
         done = False
-        input_length = len(chat.messages)
+        delta: list[types.Message] = []
+        stream = self._stream and kwargs.get("response_format") is None
         while not done:
-            response = await self._backend.generate(chat, tools=tools, **kwargs)
-            choice: types.Choice = random.choice(response.choices)  # noqa: S311
-            message = choice.message
+            if stream:
+                message = await self._stream_message(chat, **kwargs)
+            else:
+                response = await self._backend.generate(chat, **kwargs)
+                choice = self._choice_strategy(response.choices)
+                message = choice.message
             chat.append(message)
+            delta.append(message)
             if message.tool_calls:
-                for tool_call in message.tool_calls:
-                    tool_call_output = await self._tool_manager(tool_call)
+                tool_call_outputs = await asyncio.gather(
+                    *(self._tool_manager(tool_call) for tool_call in message.tool_calls),
+                )
+                for tool_call_output in tool_call_outputs:
                     chat.append(*tool_call_output)
-                    done = False
+                    delta.extend(tool_call_output)
+                done = False
             else:
                 done = True
-        return chat.messages[input_length:]
+        return delta
+
+    async def _stream_message(self, chat: chat_lib.Chat, **kwargs: Any) -> types.AssistantMessage:
+        """Streams a response to the chat observers and assembles the message of the selected choice.
+
+        Every choice of the response is assembled from its deltas, and the choice strategy then selects one of them.
+
+        Args:
+            chat: The chat to use.
+            **kwargs: Additional keyword arguments to pass to the backend.
+
+        Returns:
+            The assembled `types.AssistantMessage` of the selected choice.
+        """
+        chunks = []
+        async for chunk in self._backend.stream(chat, **kwargs):
+            chat.stream(chunk)
+            chunks.append(chunk)
+        response = types.chunks_to_response(chunks)
+        return self._choice_strategy(response.choices).message
 
 
 async def agent_loop(input_fn: Callable[[], str], /, *, agent: Agent, chat: chat_lib.Chat) -> chat_lib.Chat:
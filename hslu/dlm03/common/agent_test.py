@@ -0,0 +1,65 @@
+import asyncio
+import operator
+
+from hslu.dlm03.common import agent as agent_lib
+from hslu.dlm03.common import chat as chat_lib
+from hslu.dlm03.common import types
+
+
+def _chunk(index: int, content: str) -> types.ModelResponseChunk:
+    return types.ModelResponseChunk.model_validate({
+        "id": "chunk", "created": 0, "model": "model", "object": "chat.completion.chunk",
+        "choices": [{"index": index, "delta": {"content": content}, "finish_reason": None}],
+    })
+
+
+_USAGE_CHUNK = types.ModelResponseChunk.model_validate({
+    "id": "chunk", "created": 0, "model": "model", "object": "chat.completion.chunk", "choices": [],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3},
+})
+
+
+class _FakeBackend:
+
+    def __init__(self, chunks=(_chunk(0, "Hel"), _chunk(1, "Bon"), _chunk(0, "lo"), _chunk(1, "jour"), _USAGE_CHUNK)):
+        self.chunks = chunks
+
+    async def stream(self, chat, **kwargs):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class _MessageObserver(chat_lib.ChatObserver):
+
+    def __init__(self) -> None:
+        self.messages = []
+
+    def update(self, message):
+        self.messages.append(message)
+
+
+def test_stream_applies_choice_strategy() -> None:
+    chat = chat_lib.Chat([types.UserMessage(role="user", content="Hello")])
+    agent = agent_lib.Agent(_FakeBackend(), choice_strategy=operator.itemgetter(-1))
+    messages = asyncio.run(agent(chat))
+    assert [message.content for message in messages] == ["Bonjour"]
+
+
+def test_stream_defaults_to_first_choice() -> None:
+    chat = chat_lib.Chat([types.UserMessage(role="user", content="Hello")])
+    messages = asyncio.run(agent_lib.Agent(_FakeBackend())(chat))
+    assert [message.content for message in messages] == ["Hello"]
+
+
+def test_stream_to_observer_without_stream_support() -> None:
+    chat = chat_lib.Chat([types.UserMessage(role="user", content="Hello")])
+    observer = _MessageObserver()
+    chat.add_observer(observer)
+    asyncio.run(agent_lib.Agent(_FakeBackend())(chat))
+    assert observer.messages[-1].content == "Hello"
+
+
+def test_stream_without_choices() -> None:
+    chat = chat_lib.Chat([types.UserMessage(role="user", content="Hello")])
+    messages = asyncio.run(agent_lib.Agent(_FakeBackend((_USAGE_CHUNK,)))(chat))
+    assert [message.content for message in messages] == [None]
@@ -1,10 +1,22 @@
 """This file provides abstractions for interacting with various LLM backends."""
 
+import asyncio
+import collections
+import concurrent.futures
 import dataclasses
+import functools
+import hashlib
 import os
-from typing import Any
-
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator, Sequence
+from typing import Any, override
+
+import httpx
+import numpy as np
 import openai
+import orjson
 
 from hslu.dlm03.common import chat as chat_lib
 from hslu.dlm03.common import types
@@ -18,6 +30,249 @@ _OPENAI_API_KEY_ENV_VAR = "OPENAI_API_KEY"
 
 _LLAMA_CPP_API_KEY_ENV_VAR = "LLAMA_CPP_API_KEY"
 
+_CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+_DEFAULT_MAX_CONCURRENCY = 8
+
+
+class _PerLoopTransport(httpx.AsyncBaseTransport):
+    """An HTTP/2 transport that keeps a separate connection pool for each event loop.
+
+    Pooled connections are bound to the event loop that opened them, so a pool shared across event loops (e.g., one
+    per `asyncio.run` call) would hand out connections of a closed loop. The pools are dropped with their loops.
+    """
+    _transports: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport]
+
+    def __init__(self) -> None:
+        """Initializes a `_PerLoopTransport` instance."""
+        self._transports = weakref.WeakKeyDictionary()
+
+    @override
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(
+                http2=True, limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+            )
+            self._transports[loop] = transport
+        return await transport.handle_async_request(request)
+
+    @override
+    async def aclose(self) -> None:
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+@functools.cache
+def _shared_async_http_client() -> httpx.AsyncClient:
+    """Returns the HTTP/2 client shared by all asynchronous OpenAI clients.
+
+    HTTP/2 multiplexes concurrent requests to the same host over a single connection, and sharing the client lets all
+    backends reuse the same connection pools, one per event loop.
+    """
+    return openai.DefaultAsyncHttpxClient(transport=_PerLoopTransport())
+
+
+def _to_jsonable(value: Any) -> Any:  # noqa: ANN401
+    """Converts a value that `orjson` cannot serialize natively to a JSON-compatible value.
+
+    Args:
+        value: The value to convert.
+
+    Returns:
+        The dictionary representation of pydantic models and objects with a `to_dict` method, the string
+        representation of any other value.
+    """
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    return str(value)
+
+
+class ResponseCache:
+    """A thread-safe LRU cache of model responses keyed by the exact request.
+
+    Only deterministic requests (i.e. with a temperature of 0) are cached, since sampling at a higher temperature is
+    expected to produce different responses for the same request.
+    """
+    _entries: collections.OrderedDict[str, tuple[float, types.ModelResponse]]
+    _lock: threading.Lock
+    _max_size: int
+    _ttl: float | None
+
+    def __init__(self, max_size: int = 128, ttl: float | None = None) -> None:
+        """Initializes a `ResponseCache` instance.
+
+        Args:
+            max_size: The maximum number of responses to keep in the cache.
+            ttl: The number of seconds after which a cached response expires. If None, responses never expire.
+        """
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._ttl = ttl
+
+    @staticmethod
+    def key(model: str, response_format: type | None, **kwargs: Any) -> str | None:
+        """Computes the cache key of a request.
+
+        Every keyword argument of the API call is part of the key, so requests differing in any parameter (e.g.,
+        `max_tokens`, `stop` or `seed`) never share a cached response.
+
+        Args:
+            model: The model name.
+            response_format: The type of the expected response from the model.
+            **kwargs: The keyword arguments of the API call.
+
+        Returns:
+            The cache key of the request, or None if the request should not be cached.
+        """
+        if kwargs.get("temperature", 0) != 0:
+            return None
+        request = {
+            **kwargs,
+            "model": model,
+            "messages": [types.message_to_dict(message) for message in kwargs.get("messages", ())],
+            "response_format": (f"{response_format.__module__}.{response_format.__qualname__}"
+                                if response_format is not None else None),
+        }
+        return hashlib.sha256(orjson.dumps(request, default=_to_jsonable, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def get(self, key: str) -> types.ModelResponse | None:
+        """Returns the cached response for the given key.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            The cached response, or None if there is no valid entry for the key.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            timestamp, response = entry
+            if self._ttl is not None and time.monotonic() - timestamp > self._ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def put(self, key: str, response: types.ModelResponse) -> None:
+        """Stores a response in the cache, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: The cache key.
+            response: The response to store.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+class SemanticCache:
+    """An LRU cache of model responses keyed by the embedding of the conversation.
+
+    A cached response is returned whenever the cosine similarity between the embedding of the conversation and the
+    embedding of a cached conversation reaches the given threshold.
+    """
+    _client: openai.AsyncClient
+    _model: str
+    _threshold: float
+    _max_size: int
+    _embeddings: np.ndarray | None
+    _responses: list[types.ModelResponse]
+    _last_used: list[int]
+    _clock: int
+    _lock: asyncio.Lock
+
+    def __init__(self, *, client: openai.AsyncClient, model: str = "text-embedding-3-small", threshold: float = 0.92,
+                 max_size: int = 128) -> None:
+        """Initializes a `SemanticCache` instance.
+
+        Args:
+            client: The OpenAI async client used to compute the embeddings.
+            model: The embedding model name.
+            threshold: The minimum cosine similarity for a cached response to be returned.
+            max_size: The maximum number of responses to keep in the cache.
+        """
+        self._client = client
+        self._model = model
+        self._threshold = threshold
+        self._max_size = max_size
+        self._embeddings = None
+        self._responses = []
+        self._last_used = []
+        self._clock = 0
+        self._lock = asyncio.Lock()
+
+    async def embed(self, chat: chat_lib.Chat) -> np.ndarray:
+        """Computes the normalized embedding of a chat.
+
+        Args:
+            chat: The chat to embed.
+
+        Returns:
+            A normalized `float32` embedding vector, or a zero vector if the embedding has no direction (e.g., for a
+            chat without content), which never matches any cached chat.
+        """
+        contents = (types.message_to_dict(message).get("content") for message in chat.messages)
+        text = "\n".join(str(content) for content in contents if content)
+        response = await self._client.embeddings.create(model=self._model, input=text)
+        embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else np.zeros_like(embedding)
+
+    def get(self, embedding: np.ndarray) -> types.ModelResponse | None:
+        """Returns the cached response most similar to the given embedding.
+
+        Args:
+            embedding: The normalized embedding of the chat.
+
+        Returns:
+            The cached response, or None if no cached chat is similar enough.
+        """
+        if self._embeddings is None:
+            return None
+        similarities = self._embeddings @ embedding
+        index = int(similarities.argmax())
+        if similarities[index] < self._threshold:
+            return None
+        self._clock += 1
+        self._last_used[index] = self._clock
+        return self._responses[index]
+
+    async def put(self, embedding: np.ndarray, response: types.ModelResponse) -> None:
+        """Stores a response in the cache, evicting the least recently used entry if the cache is full.
+
+        Args:
+            embedding: The normalized embedding of the chat.
+            response: The response to store.
+        """
+        async with self._lock:
+            self._clock += 1
+            if self._embeddings is None:
+                self._embeddings = embedding[None, :]
+            elif len(self._responses) < self._max_size:
+                self._embeddings = np.concatenate([self._embeddings, embedding[None, :]])
+            else:
+                index = int(np.argmin(self._last_used))
+                self._embeddings[index] = embedding
+                self._responses[index] = response
+                self._last_used[index] = self._clock
+                return
+            self._responses.append(response)
+            self._last_used.append(self._clock)
+
 
 class LLMBackend:
     """A class that provides an interface to an LLM backend.
@@ -72,28 +327,55 @@ class LLMBackend:
         """
         return self(messages=chat.messages, **kwargs)
 
+    def generate_many(self, chats: Sequence[chat_lib.Chat], /, *, max_concurrency: int = _DEFAULT_MAX_CONCURRENCY,
+                      **kwargs: Any) -> list[types.ModelResponse]:
+        """Generates responses for independent chats concurrently.
+
+        The requests are sent from a thread pool, so that the waiting time of each request overlaps with the others
+        while the rate limiter still bounds the number of requests per minute.
+
+        Args:
+            chats: The chats to generate responses for.
+            max_concurrency: The maximum number of requests in flight at the same time.
+            **kwargs: Additional keyword arguments to pass to the `generate` method.
+
+        Returns:
+            A list of `types.ModelResponse` objects, in the same order as the chats.
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return list(executor.map(lambda chat: self.generate(chat, **kwargs), chats))
+
 
 class AsyncLLMBackend:
     """A class that provides an asynchronous interface to an LLM backend.
 
     It uses an `openai.AsyncClient` to interact with the LLM and enforces a
-    rate limit on the number of calls per minute.
+    rate limit on the number of calls per minute. Deterministic requests can
+    optionally be served from a `ResponseCache`, and similar conversations
+    from a `SemanticCache`.
     """
     _client: openai.AsyncClient
     _model: str
-    _ratelimiter: ratelimit.RateLimiter
+    _ratelimiter: ratelimit.RateLimiter | None
+    _cache: ResponseCache | None
+    _semantic_cache: SemanticCache | None
 
-    def __init__(self, *, client: openai.AsyncClient, model: str, ratelimiter: ratelimit.RateLimiter) -> None:
+    def __init__(self, *, client: openai.AsyncClient, model: str, ratelimiter: ratelimit.RateLimiter | None,
+                 cache: ResponseCache | None = None, semantic_cache: SemanticCache | None = None) -> None:
         """Initializes an `AsyncLLMBackend` instance.
 
         Args:
             client: The OpenAI async client.
             model: The model name.
-            ratelimiter: The rate limiter.
+            ratelimiter: The rate limiter (optional).
+            cache: The cache for deterministic responses (optional).
+            semantic_cache: The cache for responses to similar conversations (optional).
         """
         self._client = client
         self._model = model
         self._ratelimiter = ratelimiter
+        self._cache = cache
+        self._semantic_cache = semantic_cache
 
     async def __call__(self, *, response_format: type | None = None, **kwargs: Any) -> types.ModelResponse:
         """Calls the LLM backend and returns its output.
@@ -105,17 +387,29 @@ class AsyncLLMBackend:
         Returns:
             A `types.ModelResponse` object representing the model's response.
         """
-        with self._ratelimiter:
-            if response_format is not None:
-                kwargs["response_format"] = response_format
-                fn = self._client.chat.completions.parse
-            else:
-                fn = self._client.chat.completions.create
-            return await fn(model=self._model, **kwargs)
+        key = None
+        if self._cache is not None:
+            key = self._cache.key(self._model, response_format, **kwargs)
+            if key is not None and (response := self._cache.get(key)) is not None:
+                return response
+        if self._ratelimiter is not None:
+            await self._ratelimiter.aacquire()
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+            fn = self._client.chat.completions.parse
+        else:
+            fn = self._client.chat.completions.create
+        response = await fn(model=self._model, **kwargs)
+        if key is not None:
+            self._cache.put(key, response)
+        return response
 
     async def generate(self, chat: chat_lib.Chat, /, **kwargs: Any) -> types.ModelResponse:
         """Generates a response from the LLM asynchronously based on the chat history.
 
+        The semantic cache is skipped for requests with tools or a response format, as a similar conversation is not
+        enough to guarantee that the cached tool calls or structured output are still valid.
+
         Args:
             chat: A `chat_lib.Chat` object containing the conversation history.
             **kwargs: Additional keyword arguments to pass to the `__call__` method.
@@ -124,7 +418,174 @@ class AsyncLLMBackend:
             A `types.ModelResponse` object representing the model's response.
 
         """
-        return await self(messages=chat.messages, **kwargs)
+        if self._semantic_cache is None or kwargs.get("tools") or kwargs.get("response_format") is not None:
+            return await self(messages=chat.messages, **kwargs)
+        embedding = await self._semantic_cache.embed(chat)
+        response = self._semantic_cache.get(embedding)
+        if response is None:
+            response = await self(messages=chat.messages, **kwargs)
+            await self._semantic_cache.put(embedding, response)
+        return response
+
+    async def generate_many(self, chats: Sequence[chat_lib.Chat], /, *,
+                            max_concurrency: int = _DEFAULT_MAX_CONCURRENCY,
+                            **kwargs: Any) -> list[types.ModelResponse]:
+        """Generates responses for independent chats concurrently.
+
+        Args:
+            chats: The chats to generate responses for.
+            max_concurrency: The maximum number of requests in flight at the same time.
+            **kwargs: Additional keyword arguments to pass to the `generate` method.
+
+        Returns:
+            A list of `types.ModelResponse` objects, in the same order as the chats.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def generate(chat: chat_lib.Chat) -> types.ModelResponse:
+            async with semaphore:
+                return await self.generate(chat, **kwargs)
+
+        return list(await asyncio.gather(*(generate(chat) for chat in chats)))
+
+    async def stream(self, chat: chat_lib.Chat, /, **kwargs: Any) -> AsyncIterator[types.ModelResponseChunk]:
+        """Streams a response from the LLM based on the chat history.
+
+        Streamed responses go through the same caches as `generate`: a cached response is replayed as a single chunk
+        holding all of its choices, and a streamed response is assembled and cached once it is complete.
+
+        Args:
+            chat: A `chat_lib.Chat` object containing the conversation history.
+            **kwargs: Additional keyword arguments to pass to the API call.
+
+        Yields:
+            `types.ModelResponseChunk` objects as they are received from the model.
+        """
+        key, embedding, response = await self._lookup_stream(chat, **kwargs)
+        if response is not None:
+            yield types.response_to_chunk(response)
+            return
+        if self._ratelimiter is not None:
+            await self._ratelimiter.aacquire()
+        stream = await self._client.chat.completions.create(
+            model=self._model, messages=chat.messages, stream=True, **kwargs,
+        )
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        if key is None and embedding is None:
+            return
+        response = types.chunks_to_response(chunks)
+        if key is not None:
+            self._cache.put(key, response)
+        if embedding is not None:
+            await self._semantic_cache.put(embedding, response)
+
+    async def _lookup_stream(
+            self, chat: chat_lib.Chat, /, **kwargs: Any,
+    ) -> tuple[str | None, np.ndarray | None, types.ModelResponse | None]:
+        """Looks up the response to a streamed request in the caches.
+
+        Args:
+            chat: A `chat_lib.Chat` object containing the conversation history.
+            **kwargs: Additional keyword arguments to pass to the API call.
+
+        Returns:
+            The response cache key and the chat embedding under which the response should be cached (None if the
+            respective cache does not apply), and the cached response if any.
+        """
+        key = None
+        if self._cache is not None:
+            key = self._cache.key(self._model, None, messages=chat.messages, **kwargs)
+            if key is not None and (response := self._cache.get(key)) is not None:
+                return key, None, response
+        embedding = None
+        if self._semantic_cache is not None and not kwargs.get("tools"):
+            embedding = await self._semantic_cache.embed(chat)
+            if (response := self._semantic_cache.get(embedding)) is not None:
+                return key, embedding, response
+        return key, embedding, None
+
+
+class BatchLLMBackend(AsyncLLMBackend):
+    """A class that provides an interface to the OpenAI Batch API.
+
+    Batches are processed offline at a reduced cost, which makes this backend suited for large latency-insensitive
+    workloads such as evaluations or dataset labeling.
+    """
+
+    async def submit(self, chats: Sequence[chat_lib.Chat], /, **kwargs: Any) -> str:
+        """Submits a batch of chats to be completed.
+
+        Args:
+            chats: The chats to complete.
+            **kwargs: Additional keyword arguments to pass to each chat completion request.
+
+        Returns:
+            The ID of the submitted batch.
+        """
+        if self._ratelimiter is not None:
+            await self._ratelimiter.aacquire()
+        requests = (
+            {
+                "custom_id": str(i),
+                "method": "POST",
+                "url": _CHAT_COMPLETIONS_ENDPOINT,
+                "body": {
+                    "model": self._model,
+                    "messages": [types.message_to_dict(message) for message in chat.messages],
+                    **kwargs,
+                },
+            }
+            for i, chat in enumerate(chats)
+        )
+        data = b"\n".join(orjson.dumps(request) for request in requests)
+        batch_file = await self._client.files.create(file=("batch.jsonl", data), purpose="batch")
+        batch = await self._client.batches.create(
+            input_file_id=batch_file.id, endpoint=_CHAT_COMPLETIONS_ENDPOINT, completion_window="24h",
+        )
+        return batch.id
+
+    async def collect(self, batch_id: str, /, *, poll_interval: float = 1.,
+                      max_poll_interval: float = 60.) -> list[types.ModelResponse]:
+        """Waits for a batch to complete and returns its responses.
+
+        The batch status is polled with an exponential backoff.
+
+        Args:
+            batch_id: The ID of the batch, as returned by `submit`.
+            poll_interval: The initial number of seconds between two status checks.
+            max_poll_interval: The maximum number of seconds between two status checks.
+
+        Returns:
+            A list of `types.ModelResponse` objects, in the same order as the submitted chats.
+
+        Raises:
+            RuntimeError: If the batch or any of its requests failed.
+        """
+        while True:
+            batch = await self._client.batches.retrieve(batch_id)
+            if batch.status == "completed":
+                break
+            if batch.status in {"failed", "expired", "cancelling", "cancelled"}:
+                error_message = f"Batch {batch_id} did not complete: {batch.status}"
+                raise RuntimeError(error_message)
+            await asyncio.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, max_poll_interval)
+        responses = {}
+        if batch.output_file_id is not None:
+            output = await self._client.files.content(batch.output_file_id)
+            for line in output.text.splitlines():
+                result = orjson.loads(line)
+                if result.get("error") is None:
+                    responses[int(result["custom_id"])] = types.ModelResponse.model_validate(
+                        result["response"]["body"])
+        total = batch.request_counts.total if batch.request_counts is not None else len(responses)
+        if len(responses) != total:
+            error_message = f"Batch {batch_id} completed with {total - len(responses)} failed requests."
+            raise RuntimeError(error_message)
+        return [responses[i] for i in range(total)]
 
 
 @dataclasses.dataclass(kw_only=True)
@@ -132,7 +593,8 @@ class LLMBackendConfig:
     """Abstract base class for all LLM backends.
 
     This class defines the common interface and attributes expected from any LLM backend and ways to instantiate
-    matching clients using the `openai` library
+    matching clients using the `openai` library. Clients are created once per configuration and shared by all the
+    backends it returns, so that their connection pools are reused.
     """
 
     name: str
@@ -144,18 +606,47 @@ class LLMBackendConfig:
     api_key: str | None = None
     """The API key required for authentication with the LLM service (optional)."""
     ratelimit: float | None = None
+    cache_size: int | None = None
+    """The maximum number of deterministic responses cached by async backends (optional, disabled by default)."""
+    semantic_cache_size: int | None = None
+    """The maximum number of responses cached by similarity by async backends (optional, disabled by default)."""
+    semantic_cache_model: str = "text-embedding-3-small"
+    """The embedding model used by the semantic cache."""
+    semantic_cache_threshold: float = 0.92
+    """The minimum cosine similarity for the semantic cache to return a cached response."""
+
+    @functools.cached_property
+    def client(self) -> openai.Client:
+        """The synchronous OpenAI client configured for this backend."""
+        return openai.Client(base_url=self.base_url, api_key=self.api_key)
+
+    @functools.cached_property
+    def async_client(self) -> openai.AsyncClient:
+        """The asynchronous OpenAI client configured for this backend."""
+        return openai.AsyncClient(base_url=self.base_url, api_key=self.api_key, http_client=_shared_async_http_client())
 
     def get_backend(self) -> LLMBackend:
         """Returns an `LLMBackend` instance configured for this backend configuration."""
-        client = openai.Client(base_url=self.base_url, api_key=self.api_key)
+        client = self.client
         ratelimiter = ratelimit.RateLimiter(self.ratelimit) if self.ratelimit is not None else None
         return LLMBackend(client=client, model=self.model_name, ratelimiter=ratelimiter)
 
     def get_async_backend(self) -> AsyncLLMBackend:
         """Returns an `AsyncLLMBackend` instance configured for this backend configuration."""
-        client = openai.AsyncClient(base_url=self.base_url, api_key=self.api_key)
+        client = self.async_client
+        ratelimiter = ratelimit.RateLimiter(self.ratelimit) if self.ratelimit is not None else None
+        cache = ResponseCache(self.cache_size) if self.cache_size is not None else None
+        semantic_cache = SemanticCache(
+            client=client, model=self.semantic_cache_model, threshold=self.semantic_cache_threshold,
+            max_size=self.semantic_cache_size,
+        ) if self.semantic_cache_size is not None else None
+        return AsyncLLMBackend(client=client, model=self.model_name, ratelimiter=ratelimiter, cache=cache,
+                               semantic_cache=semantic_cache)
+
+    def get_batch_backend(self) -> BatchLLMBackend:
+        """Returns a `BatchLLMBackend` instance configured for this backend configuration."""
         ratelimiter = ratelimit.RateLimiter(self.ratelimit) if self.ratelimit is not None else None
-        return AsyncLLMBackend(client=client, model=self.model_name, ratelimiter=ratelimiter)
+        return BatchLLMBackend(client=self.async_client, model=self.model_name, ratelimiter=ratelimiter)
 
     def get_async_client(self) -> tuple[openai.AsyncClient, str]:
         """Returns an asynchronous OpenAI client configured for this backend and the model name.
@@ -167,8 +658,7 @@ class LLMBackendConfig:
             tuple[openai.AsyncClient, str]: A tuple containing the configured
                                             `openai.AsyncClient` instance and the model name.
         """
-        client = openai.AsyncClient(base_url=self.base_url, api_key=self.api_key)
-        return client, self.model_name
+        return self.async_client, self.model_name
 
     def get_client(self) -> tuple[openai.Client, str]:
         """Returns a synchronous OpenAI client configured for this backend and the model name.
@@ -180,8 +670,7 @@ class LLMBackendConfig:
             tuple[openai.Client, str]: A tuple containing the configured
                                        `openai.Client` instance and the model name.
         """
-        client = openai.Client(base_url=self.base_url, api_key=self.api_key)
-        return client, self.model_name
+        return self.client, self.model_name
 
 
 @dataclasses.dataclass(kw_only=True)
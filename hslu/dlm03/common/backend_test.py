@@ -0,0 +1,213 @@
+import asyncio
+import http.server
+import threading
+import types as pytypes
+
+import numpy as np
+import pytest
+
+from hslu.dlm03.common import backend, types
+from hslu.dlm03.common import chat as chat_lib
+
+_MESSAGES = [{"role": "user", "content": "Hello"}]
+
+
+class _FakeCompletions:
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if kwargs.get("stream"):
+            return _stream(_CHUNKS)
+        return f"response-{len(self.calls)}"
+
+
+def _chunk(index: int, content: str | None = None, finish_reason: str | None = None) -> types.ModelResponseChunk:
+    return types.ModelResponseChunk.model_validate({
+        "id": "chunk", "created": 0, "model": "model", "object": "chat.completion.chunk",
+        "choices": [{"index": index, "delta": {"content": content}, "finish_reason": finish_reason}],
+    })
+
+
+_CHUNKS = [
+    _chunk(0, "Hel"), _chunk(1, "Bon"), _chunk(0, "lo"), _chunk(1, "jour"), _chunk(0, finish_reason="stop"),
+    _chunk(1, finish_reason="length"),
+]
+
+
+async def _stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def _fake_client() -> pytypes.SimpleNamespace:
+    return pytypes.SimpleNamespace(chat=pytypes.SimpleNamespace(completions=_FakeCompletions()))
+
+
+def test_key_temperature_gating() -> None:
+    assert backend.ResponseCache.key("model", None, messages=_MESSAGES) is not None
+    assert backend.ResponseCache.key("model", None, messages=_MESSAGES, temperature=0) is not None
+    assert backend.ResponseCache.key("model", None, messages=_MESSAGES, temperature=0.7) is None
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"n": 2}, {"max_tokens": 16}, {"stop": ["\n"]}, {"tool_choice": "none"}, {"seed": 1}, {"top_p": 0.5},
+])
+def test_key_includes_all_kwargs(kwargs) -> None:
+    base = backend.ResponseCache.key("model", None, messages=_MESSAGES)
+    assert backend.ResponseCache.key("model", None, messages=_MESSAGES, **kwargs) != base
+
+
+def test_key_is_stable() -> None:
+    first = backend.ResponseCache.key("model", None, messages=_MESSAGES, max_tokens=16, seed=1)
+    second = backend.ResponseCache.key("model", None, seed=1, messages=list(_MESSAGES), max_tokens=16)
+    assert first == second
+
+
+def test_hit() -> None:
+    cache = backend.ResponseCache()
+    cache.put("key", "response")
+    assert cache.get("key") == "response"
+    assert cache.get("other") is None
+
+
+def test_ttl_expiry(monkeypatch) -> None:
+    now = [0.]
+    monkeypatch.setattr(backend.time, "monotonic", lambda: now[0])
+    cache = backend.ResponseCache(ttl=10.)
+    cache.put("key", "response")
+    now[0] = 10.
+    assert cache.get("key") == "response"
+    now[0] = 10.5
+    assert cache.get("key") is None
+
+
+def test_lru_eviction() -> None:
+    cache = backend.ResponseCache(max_size=2)
+    cache.put("a", "response-a")
+    cache.put("b", "response-b")
+    assert cache.get("a") == "response-a"
+    cache.put("c", "response-c")
+    assert cache.get("b") is None
+    assert cache.get("a") == "response-a"
+    assert cache.get("c") == "response-c"
+
+
+def test_backend_uses_cache() -> None:
+    client = _fake_client()
+    llm = backend.AsyncLLMBackend(client=client, model="model", ratelimiter=None, cache=backend.ResponseCache())
+
+    async def run() -> list[str]:
+        return [
+            await llm(messages=_MESSAGES),
+            await llm(messages=_MESSAGES),
+            await llm(messages=_MESSAGES, max_tokens=16),
+            await llm(messages=_MESSAGES, temperature=1),
+            await llm(messages=_MESSAGES, temperature=1),
+        ]
+
+    assert asyncio.run(run()) == ["response-1", "response-1", "response-2", "response-3", "response-4"]
+    assert len(client.chat.completions.calls) == 4
+
+
+def test_stream_uses_cache() -> None:
+    client = _fake_client()
+    llm = backend.AsyncLLMBackend(client=client, model="model", ratelimiter=None, cache=backend.ResponseCache())
+    chat = chat_lib.Chat(_MESSAGES)
+
+    async def run() -> tuple[list, list]:
+        return [chunk async for chunk in llm.stream(chat)], [chunk async for chunk in llm.stream(chat)]
+
+    streamed, replayed = asyncio.run(run())
+    assert streamed == _CHUNKS
+    assert len(client.chat.completions.calls) == 1
+    assert len(replayed) == 1
+    assert [(choice.index, choice.delta.content, choice.finish_reason) for choice in replayed[0].choices] == [
+        (0, "Hello", "stop"), (1, "Bonjour", "length"),
+    ]
+
+
+def test_stream_skips_cache_when_sampling() -> None:
+    client = _fake_client()
+    llm = backend.AsyncLLMBackend(client=client, model="model", ratelimiter=None, cache=backend.ResponseCache())
+    chat = chat_lib.Chat(_MESSAGES)
+
+    async def run() -> None:
+        for _ in range(2):
+            async for _chunk in llm.stream(chat, temperature=1):
+                pass
+
+    asyncio.run(run())
+    assert len(client.chat.completions.calls) == 2
+
+
+class _FakeEmbeddings:
+
+    def __init__(self, vectors: dict[str, list[float]]) -> None:
+        self.vectors = vectors
+
+    async def create(self, *, model, input):
+        return pytypes.SimpleNamespace(data=[pytypes.SimpleNamespace(embedding=self.vectors[input])])
+
+
+def test_semantic_cache() -> None:
+    embeddings = _FakeEmbeddings({"Hello": [1., 0.], "Hello!": [0.99, 0.1], "Bye": [0., 1.], "": [0., 0.]})
+    cache = backend.SemanticCache(client=pytypes.SimpleNamespace(embeddings=embeddings), threshold=0.9)
+
+    async def embed(content: str) -> np.ndarray:
+        return await cache.embed(chat_lib.Chat([{"role": "user", "content": content}]))
+
+    async def run() -> None:
+        await cache.put(await embed("Hello"), "response")
+        assert cache.get(await embed("Hello!")) == "response"
+        assert cache.get(await embed("Bye")) is None
+        empty = await embed("")
+        assert not np.isnan(empty).any()
+        assert cache.get(empty) is None
+
+    asyncio.run(run())
+
+
+def test_config_semantic_cache() -> None:
+    config = backend.LLMBackendConfig(name="test", base_url="http://localhost", model_name="model", api_key="key",
+                                      semantic_cache_size=4, semantic_cache_model="embedding")
+    semantic_cache = config.get_async_backend()._semantic_cache
+    assert semantic_cache is not None
+    assert semantic_cache._model == "embedding"
+    assert semantic_cache._max_size == 4
+    assert config.__class__(name="test", base_url="http://localhost", model_name="model",
+                            api_key="key").get_async_backend()._semantic_cache is None
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_shared_http_client_across_event_loops() -> None:
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    client = backend._shared_async_http_client()
+
+    async def get() -> str:
+        response = await client.get(url)
+        return response.text
+
+    try:
+        # Each call runs on a new event loop, the second one must not reuse connections of the first, closed one.
+        assert [asyncio.run(get()) for _ in range(3)] == ["ok"] * 3
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -14,6 +14,9 @@ class ChatObserver(Protocol):
         """Updates the observer with the latest chat messages."""
         raise NotImplementedError
 
+    def update_stream(self, chunk: types.ModelResponseChunk) -> None:
+        """Updates the observer with a chunk of a message being streamed, ignores it by default."""
+
 
 class Chat:
     """A class representing a chat."""
@@ -43,6 +46,17 @@ class Chat:
             for observer in self._observers:
                 observer.update(message)
 
+    def stream(self, chunk: types.ModelResponseChunk) -> None:
+        """Notifies the observers of a chunk of a message being streamed.
+
+        The chunk is not added to the chat, the complete message is expected to be appended once streamed.
+
+        Args:
+            chunk: The streamed chunk.
+        """
+        for observer in self._observers:
+            observer.update_stream(chunk)
+
     def add_observer(self, observer: ChatObserver) -> bool:
         """Adds an observer to the chat.
 
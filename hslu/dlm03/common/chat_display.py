@@ -9,10 +9,22 @@ from hslu.dlm03.common import chat, types
 class ChatDisplay(abc.ABC, chat.ChatObserver):
     """Abstract base class for displaying chat messages."""
 
+    _ROLE_DISPATCH: typing.ClassVar[dict[str, str]] = {
+        "system": "display_system",
+        "assistant": "_display_assistant_message",
+        "user": "display_user",
+        "tool": "display_tool_call_output",
+    }
+    """Maps message roles to the name of the method displaying them."""
+
     @typing.override
     def update(self, message: types.Message) -> None:
         self.display(message)
 
+    @typing.override
+    def update_stream(self, chunk: types.ModelResponseChunk) -> None:
+        self.display_stream(chunk)
+
     @abc.abstractmethod
     def clear(self) -> None:
         """Clears the display."""
@@ -28,7 +40,10 @@ class ChatDisplay(abc.ABC, chat.ChatObserver):
         Returns:
             The content of the message.
         """
-        return message.content if hasattr(message, "content") else message["content"]
+        try:
+            return message.content
+        except AttributeError:
+            return message["content"]
 
     @staticmethod
     def role(message: types.Message) -> str | None:
@@ -40,11 +55,10 @@ class ChatDisplay(abc.ABC, chat.ChatObserver):
         Returns:
             The role of the message.
         """
-        if hasattr(message, "role"):
+        try:
             return message.role
-        if "role" in message:
-            return message["role"]
-        return None
+        except AttributeError:
+            return message.get("role")
 
     def display(self, message: types.Message) -> None:
         """Displays a message.
@@ -54,22 +68,32 @@ class ChatDisplay(abc.ABC, chat.ChatObserver):
 
         """
         role = self.role(message)
-        match role:
-            case "system":
-                self.display_system(message)
-            case "assistant":
-                if message.content:
-                    self.display_assistant(message)
-                if message.tool_calls:
-                    for tool_call in message.tool_calls:
-                        self.display_tool_call(tool_call)
-            case "user":
-                self.display_user(message)
-            case "tool":
-                self.display_tool_call_output(message)
-            case _:
-                error_message = f"Unknown message role: {role}"
-                raise ValueError(error_message)
+        method_name = self._ROLE_DISPATCH.get(role)
+        if method_name is None:
+            error_message = f"Unknown message role: {role}"
+            raise ValueError(error_message)
+        getattr(self, method_name)(message)
+
+    def _display_assistant_message(self, message: types.AssistantMessage) -> None:
+        """Displays an assistant message and its tool calls.
+
+        Args:
+            message: The assistant message to display.
+        """
+        if message.content:
+            self.display_assistant(message)
+        if message.tool_calls:
+            for tool_call in message.tool_calls:
+                self.display_tool_call(tool_call)
+
+    def display_stream(self, chunk: types.ModelResponseChunk) -> None:
+        """Displays a chunk of an assistant message being streamed.
+
+        Displays that do not support streaming ignore the chunks and only display the complete message.
+
+        Args:
+            chunk: The streamed chunk to display.
+        """
 
     @abc.abstractmethod
     def display_system(self, message: types.SystemMessage) -> None:
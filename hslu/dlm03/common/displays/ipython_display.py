@@ -1,8 +1,7 @@
 """Provides an IPython display for chat messages."""
+import asyncio
 import html
-import json
 import typing
-from xml.etree import ElementTree as ET
 
 import ipywidgets
 import markdown
@@ -10,6 +9,10 @@ from IPython import display as ipydisplay
 
 from hslu.dlm03.common import chat_display, types
 
+_RELOAD_INTERVAL = 0.05
+_CONTAINER_OPEN = '<div class="chat-container" id="chat">'
+_CONTAINER_CLOSE = "</div>"
+
 _DEFAULT_CSS = """
 .chat-container {
     font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif;
@@ -99,12 +102,29 @@ _DEFAULT_CSS = """
 """
 
 
+class _EscapeHtmlExtension(markdown.Extension):
+    """A markdown extension that escapes raw HTML instead of passing it through to the output."""
+
+    @typing.override
+    def extendMarkdown(self, md: markdown.Markdown) -> None:
+        md.preprocessors.deregister("html_block")
+        md.inlinePatterns.deregister("html")
+
+
 class IPythonChatDisplay(chat_display.ChatDisplay):
-    """An IPython display for chat messages."""
+    """An IPython display for chat messages.
+
+    Each message is serialized to HTML once when added, so updating the widget does not re-serialize the whole chat.
+    When an event loop is running, updates of a streamed message are coalesced over `_RELOAD_INTERVAL` seconds to
+    limit the traffic between the kernel and the front-end. Complete messages are written immediately, and a pending
+    update is written when its event loop shuts down, so the last update is never lost.
+    """
 
     _widget: ipywidgets.HTML
-    _html: ET.Element
-    _css: ET.Element
+    _header: str
+    _body_parts: list[str]
+    _stream_text: str | None
+    _flush_task: asyncio.Task[None] | None
 
     def __init__(self, *, css: str = _DEFAULT_CSS) -> None:
         """Initializes an `IPythonDisplay` instance.
@@ -115,10 +135,11 @@ class IPythonChatDisplay(chat_display.ChatDisplay):
         super().__init__()
         self._widget = ipywidgets.HTML()
 
-        self._css = ET.Element("style")
-        self._css.text = css
+        self._header = f"<style>{css}</style>{_CONTAINER_OPEN}"
 
-        self._html = ET.Element("div")
+        self._body_parts = []
+        self._stream_text = None
+        self._flush_task = None
         self.clear()
 
     def show(self) -> None:
@@ -126,8 +147,40 @@ class IPythonChatDisplay(chat_display.ChatDisplay):
         ipydisplay.display(self._widget)
 
     def reload(self) -> None:
-        """Reloads the current HTML content into the widget."""
-        self._widget.value = ET.tostring(self._css).decode() + ET.tostring(self._html).decode()
+        """Reloads the current HTML content into the widget.
+
+        The reload is deferred when an event loop is running, so that bursts of updates result in a single one.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._flush()
+            return
+        if self._flush_task is not None and self._flush_task.get_loop() is loop:
+            return
+        self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        """Writes the current HTML content into the widget after `_RELOAD_INTERVAL` seconds.
+
+        The content is also written if the task is cancelled, which happens when its event loop shuts down.
+        """
+        try:
+            await asyncio.sleep(_RELOAD_INTERVAL)
+        finally:
+            if self._flush_task is asyncio.current_task():
+                self._flush_task = None
+                self._flush()
+
+    def _flush(self) -> None:
+        """Writes the current HTML content into the widget, cancelling any pending deferred write."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        stream_part = ""
+        if self._stream_text is not None:
+            stream_part = f'<div class="message assistant">{html.escape(self._stream_text)}</div>'
+        self._widget.value = self._header + "".join(self._body_parts) + stream_part + _CONTAINER_CLOSE
 
     def _add_message(self, role: str, text: str) -> None:
         """Adds a message to the chat.
@@ -136,22 +189,28 @@ class IPythonChatDisplay(chat_display.ChatDisplay):
             role: The role of the message.
             text: The text of the message.
         """
-        element = ET.Element("div", attrib={"class": f"message {role}"})
+        self._stream_text = None
         try:
-            message = ET.fromstring("<div>" + markdown.markdown(text) + "</div>")  # noqa: S314
+            message = markdown.markdown(text, extensions=[_EscapeHtmlExtension()])
         except Exception: # noqa: BLE001
-            message = ET.fromstring("<div>" + html.escape(text) + "</div>")
-        element.append(message)
-
-        self._html.append(element)
-        self.reload()
+            message = html.escape(text)
+        self._body_parts.append(f'<div class="message {role}"><div>{message}</div></div>')
+        # The message is complete, so it is written immediately rather than possibly after its event loop is gone.
+        self._flush()
 
     @typing.override
     def clear(self) -> None:
-        self._html.clear()
-        self._html.attrib["class"] = "chat-container"
-        self._html.attrib["id"] = "chat"
+        self._stream_text = None
+        self._body_parts.clear()
+
+        self._flush()
 
+    @typing.override
+    def display_stream(self, chunk: types.ModelResponseChunk) -> None:
+        delta = "".join(choice.delta.content or "" for choice in chunk.choices if choice.index == 0)
+        if not delta:
+            return
+        self._stream_text = (self._stream_text or "") + delta
         self.reload()
 
     @typing.override
@@ -168,7 +227,7 @@ class IPythonChatDisplay(chat_display.ChatDisplay):
 
     @typing.override
     def display_tool_call(self, tool_call: types.ToolCall) -> None:
-        arguments = json.loads(tool_call.function.arguments)
+        arguments = types.tool_call_arguments(tool_call)
         arguments_string = f"{', '.join([f'{k}={v}' for k, v in arguments.items()])}"
         tool_call_string = f"{tool_call.function.name}({arguments_string})"
         self._add_message("tool_call", tool_call_string)
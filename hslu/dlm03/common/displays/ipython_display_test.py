@@ -0,0 +1,46 @@
+import asyncio
+
+import markdown
+
+from hslu.dlm03.common import types
+from hslu.dlm03.common.displays import ipython_display
+
+
+def test_markdown_escapes_raw_html() -> None:
+    text = "<script>alert(1)</script>\n\nHi <b onclick=x>there</b> **you** `a<b`"
+    rendered = markdown.markdown(text, extensions=[ipython_display._EscapeHtmlExtension()])
+    assert "<script>" not in rendered
+    assert "<b " not in rendered
+    assert "&lt;script&gt;" in rendered
+    assert "<strong>you</strong>" in rendered
+    assert "<code>a&lt;b</code>" in rendered
+
+
+def _chunk(content: str) -> types.ModelResponseChunk:
+    return types.ModelResponseChunk.model_validate({
+        "id": "chunk", "created": 0, "model": "model", "object": "chat.completion.chunk",
+        "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+    })
+
+
+def test_final_message_flushed_before_loop_closes() -> None:
+    display = ipython_display.IPythonChatDisplay()
+
+    async def run() -> None:
+        display.display_stream(_chunk("Hel"))
+        display.display_stream(_chunk("lo"))
+        display.display_assistant(types.AssistantMessage(role="assistant", content="Hello world"))
+
+    asyncio.run(run())
+    assert "Hello world" in display._widget.value
+
+
+def test_pending_stream_flushed_when_loop_closes() -> None:
+    display = ipython_display.IPythonChatDisplay()
+
+    async def run() -> None:
+        display.display_stream(_chunk("Hel"))
+        display.display_stream(_chunk("lo"))
+
+    asyncio.run(run())
+    assert "Hello" in display._widget.value
@@ -1,11 +1,15 @@
 """Provides common types definitions for MCP."""
 
+import asyncio
 import contextlib
-import json
+import functools
+import time
+import types as pytypes
 from collections.abc import AsyncGenerator, Callable
-from typing import Any
+from typing import Any, Self
 
 import mcp
+import orjson
 from mcp import types as mcp_types
 from mcp.client import streamable_http
 
@@ -54,20 +58,109 @@ def mcp_session_factory(url: str, **kwargs: Any) -> ClientSessionFactory:
 
 
 class ToolManager:
-    """A class for managing MCP tools."""
+    """A class for managing MCP tools.
+
+    A single MCP client session is opened on first use and shared by all subsequent calls on the same event loop. The
+    session is entered and exited by a dedicated task that owns it for its whole lifetime, since the underlying
+    anyio streams must be closed by the task that opened them. The session is closed by `aclose`, when exiting the
+    `ToolManager` used as an asynchronous context manager, or when its event loop shuts down. The list of allowed tools
+    is cached for `tools_ttl` seconds.
+    """
 
     _session_factory: ClientSessionFactory
     _allowed_tools: set[str] | None
-
-    def __init__(self, session_factory: ClientSessionFactory, allowed_tools: set[str] | None = None) -> None:
+    _session: asyncio.Future[ClientSession] | None
+    _owner: asyncio.Task[None] | None
+    _closing: asyncio.Event | None
+    _tools_cache: list[types.Tool] | None
+    _tools_timestamp: float
+    _tools_ttl: float
+
+    def __init__(self, session_factory: ClientSessionFactory, allowed_tools: set[str] | None = None, *,
+                 tools_ttl: float = 300.) -> None:
         """Initializes a `ToolManager` instance.
 
         Args:
             session_factory: A callable that returns an asynchronous context manager for an MCP client session.
             allowed_tools: A set of allowed tool names. If None, all tools are allowed.
+            tools_ttl: The number of seconds during which the list of tools is cached.
         """
         self._session_factory = session_factory
         self._allowed_tools = allowed_tools
+        self._session = None
+        self._owner = None
+        self._closing = None
+        self._tools_cache = None
+        self._tools_timestamp = 0.
+        self._tools_ttl = tools_ttl
+
+    async def __aenter__(self) -> Self:
+        """Opens the MCP client session."""
+        await self.session()
+        return self
+
+    async def __aexit__(self, exc_type: type[BaseException] | None, exc_val: BaseException | None,
+                        exc_tb: pytypes.TracebackType | None) -> None:
+        """Closes the MCP client session."""
+        await self.aclose()
+
+    async def session(self) -> ClientSession:
+        """Returns the shared MCP client session, opening it if needed.
+
+        Returns:
+            The MCP client session.
+        """
+        loop = asyncio.get_running_loop()
+        if self._owner is not None and self._owner.get_loop() is not loop:
+            # The session belongs to another event loop, which cannot be used from here, so a new one is opened.
+            self._reset(self._owner)
+        if self._owner is None:
+            self._session = loop.create_future()
+            self._closing = asyncio.Event()
+            self._owner = loop.create_task(self._own_session(self._session, self._closing))
+        # Shielded, so that a cancelled caller does not cancel the session shared with the other callers.
+        return await asyncio.shield(self._session)
+
+    async def _own_session(self, session: asyncio.Future[ClientSession], closing: asyncio.Event) -> None:
+        """Opens the MCP client session and keeps it open until it is closed, runs in the owner task.
+
+        Args:
+            session: The future to resolve with the opened session.
+            closing: The event signaling that the session should be closed.
+        """
+        try:
+            async with self._session_factory() as opened:
+                session.set_result(opened)
+                await closing.wait()
+        except Exception as e:
+            if session.done():
+                raise
+            # The session could not be opened, the error is reported to the callers waiting for it instead.
+            session.set_exception(e)
+        finally:
+            if not session.done():
+                session.cancel()
+            self._reset(asyncio.current_task())
+
+    def _reset(self, owner: asyncio.Task[None] | None) -> None:
+        """Forgets the session owned by the given task, if it is still the current one.
+
+        Args:
+            owner: The owner task of the session to forget.
+        """
+        if self._owner is owner:
+            self._session = None
+            self._owner = None
+            self._closing = None
+
+    async def aclose(self) -> None:
+        """Closes the shared MCP client session, if any."""
+        owner, closing = self._owner, self._closing
+        if owner is None or owner.get_loop() is not asyncio.get_running_loop():
+            self._reset(owner)
+            return
+        closing.set()
+        await owner
 
     async def available_tools(self) -> list[types.Tool]:
         """Retrieves a list of available tools from the MCP server.
@@ -75,16 +168,21 @@ class ToolManager:
         Returns:
             A list of `types.Tool` objects representing the available tools.
         """
-        async with self._session_factory() as session:
-            tools_response = await session.list_tools()
-            return [tool_from_mcp(tool) for tool in tools_response.tools]
+        session = await self.session()
+        tools_response = await session.list_tools()
+        return [tool_from_mcp(tool) for tool in tools_response.tools]
 
     async def tools(self) -> list[types.Tool]:
         """Returns the list of tools that this agent can use.
 
+        The list is cached and only retrieved again from the MCP server once it is older than `tools_ttl` seconds or
+        after a call to `invalidate_tools`.
+
         Returns:
             A list of `types.Tool` objects representing the available tools.
         """
+        if self._tools_cache is not None and time.monotonic() - self._tools_timestamp < self._tools_ttl:
+            return self._tools_cache
         tools = await self.available_tools()
         if self._allowed_tools:
             tools = [
@@ -92,8 +190,14 @@ class ToolManager:
                 for tool in tools
                 if tool["function"]["name"] in self._allowed_tools
             ]
+        self._tools_cache = tools
+        self._tools_timestamp = time.monotonic()
         return tools
 
+    def invalidate_tools(self) -> None:
+        """Invalidates the cached list of tools."""
+        self._tools_cache = None
+
     async def __call__(self, tool_call: types.ToolCall) -> list[types.ToolCallOutput]:
         """Calls a tool and returns its output.
 
@@ -107,16 +211,15 @@ class ToolManager:
         if self._allowed_tools is not None and tool_name not in self._allowed_tools:
             return [types.dict_to_message(role="user", call_id=tool_call.id, type="function_call_output",
                                           content=f"Cannot call tool {tool_name}.")]
-        arguments = tool_call.function.arguments
-        async with self._session_factory() as session:
-            result = await session.call_tool(tool_name, json.loads(arguments))
-            return [
-                tool_call_result_from_mcp(
-                    tool_call.id,
-                    content,
-                )
-                for content in result.content
-            ]
+        session = await self.session()
+        result = await session.call_tool(tool_name, types.tool_call_arguments(tool_call))
+        return [
+            tool_call_result_from_mcp(
+                tool_call.id,
+                content,
+            )
+            for content in result.content
+        ]
 
     @classmethod
     def from_url(cls, url: str, allowed_tools: set[str] | None = None, **kwargs: Any) -> "ToolManager":
@@ -163,18 +266,27 @@ async def get_tools(url: str, **kwargs: Any) -> list[types.Tool]:
 def tool_from_mcp(tool: mcp_types.Tool) -> types.Tool:
     """Converts the tool from `mcp` to `openai` compatible format.
 
+    Conversions are cached by name, description and input schema, so that repeated listings of the same tools reuse
+    the same converted objects, which must therefore not be mutated.
+
     Args:
         tool: The MCP tool.
 
     Returns:
         types.Tool: The tool in `openai` compatible format.
     """
+    input_schema = orjson.dumps(tool.inputSchema, option=orjson.OPT_SORT_KEYS)
+    return _tool_from_mcp_cached(tool.name, tool.description, input_schema)
+
+
+@functools.lru_cache(maxsize=256)
+def _tool_from_mcp_cached(name: str, description: str | None, input_schema: bytes) -> types.Tool:
     return types.Tool(
         type="function",
         function=types.Function(
-            name=tool.name,
-            description=tool.description,
-            parameters=tool.inputSchema,
+            name=name,
+            description=description,
+            parameters=orjson.loads(input_schema),
             strict=True,
         ),
     )
@@ -0,0 +1,78 @@
+import asyncio
+import contextlib
+import types as pytypes
+
+import anyio
+from mcp import types as mcp_types
+
+from hslu.dlm03.common import tools, types
+
+
+class _FakeSession:
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    async def call_tool(self, name, arguments):
+        self.calls.append(name)
+        await asyncio.sleep(0)
+        return pytypes.SimpleNamespace(content=[mcp_types.TextContent(type="text", text=f"{name} done")])
+
+
+class _FakeSessionFactory:
+    """Opens sessions inside an anyio task group, which must be exited by the task that entered it."""
+
+    def __init__(self) -> None:
+        self.opened = 0
+        self.closed = 0
+        self.sessions = []
+
+    @contextlib.asynccontextmanager
+    async def __call__(self):
+        async with anyio.create_task_group():
+            self.opened += 1
+            session = _FakeSession()
+            self.sessions.append(session)
+            try:
+                yield session
+            finally:
+                self.closed += 1
+
+
+def _tool_call(name: str) -> types.ToolCall:
+    return types.ToolCall(id=name, type="function", function=types.FunctionCall(name=name, arguments="{}"))
+
+
+def test_concurrent_calls_then_close() -> None:
+    factory = _FakeSessionFactory()
+    manager = tools.ToolManager(factory)
+
+    async def run() -> list:
+        outputs = await asyncio.gather(*(asyncio.create_task(manager(_tool_call(f"tool{i}"))) for i in range(5)))
+        await manager.aclose()
+        return outputs
+
+    outputs = asyncio.run(run())
+    assert [output[0]["content"] for output in outputs] == [f"tool{i} done" for i in range(5)]
+    assert factory.opened == factory.closed == 1
+    assert len(factory.sessions[0].calls) == 5
+
+
+def test_context_manager_closes_session() -> None:
+    factory = _FakeSessionFactory()
+
+    async def run() -> None:
+        async with tools.ToolManager(factory) as manager:
+            await asyncio.gather(manager(_tool_call("a")), manager(_tool_call("b")))
+
+    asyncio.run(run())
+    assert factory.opened == factory.closed == 1
+
+
+def test_session_reopened_on_new_event_loop() -> None:
+    factory = _FakeSessionFactory()
+    manager = tools.ToolManager(factory)
+    asyncio.run(manager(_tool_call("a")))
+    assert factory.opened == factory.closed == 1
+    asyncio.run(manager(_tool_call("b")))
+    assert factory.opened == factory.closed == 2
@@ -1,10 +1,14 @@
 """Provides common types definitions."""
 
+import functools
+from collections.abc import Sequence
 from typing import Any
 
+import orjson
 from openai.types import chat
 from openai.types.chat import (
     chat_completion,
+    chat_completion_chunk,
     chat_completion_message_function_tool_call,
 )
 from openai.types.responses import response_input_param
@@ -21,6 +25,7 @@ ToolCallOutput = response_input_param.FunctionCallOutput
 Message = SystemMessage | AssistantMessage | UserMessage | ToolCallOutput
 
 ModelResponse = chat.ChatCompletion
+ModelResponseChunk = chat.ChatCompletionChunk
 Tool = chat.ChatCompletionToolParam
 Function = function_definition.FunctionDefinition
 Choice = chat_completion.Choice
@@ -60,3 +65,124 @@ def message_to_dict(message: Message) -> dict[str, Any]:
         A dictionary representation of the message.
     """
     return message.to_dict() if hasattr(message, "to_dict") else dict(message)
+
+
+def tool_call_arguments(tool_call: ToolCall) -> dict[str, Any]:
+    """Returns the parsed arguments of a tool call.
+
+    The result is cached by the raw arguments string, so the tool manager and the displays share a single parse.
+    The returned dictionary must therefore not be mutated.
+
+    Args:
+        tool_call: The tool call.
+
+    Returns:
+        A dictionary mapping argument names to their values.
+    """
+    return _parse_arguments(tool_call.function.arguments)
+
+
+def response_to_chunk(response: ModelResponse) -> ModelResponseChunk:
+    """Converts a complete response to a single chunk carrying all of its choices.
+
+    This allows replaying a cached response to consumers expecting a streamed response.
+
+    Args:
+        response: The response to convert.
+
+    Returns:
+        A `ModelResponseChunk` whose deltas hold the complete messages of the response.
+    """
+    return ModelResponseChunk(
+        id=response.id,
+        created=response.created,
+        model=response.model,
+        object="chat.completion.chunk",
+        usage=response.usage,
+        choices=[
+            chat_completion_chunk.Choice(
+                index=choice.index,
+                finish_reason=choice.finish_reason,
+                delta=chat_completion_chunk.ChoiceDelta(
+                    role="assistant",
+                    content=choice.message.content,
+                    tool_calls=[
+                        chat_completion_chunk.ChoiceDeltaToolCall(
+                            index=index,
+                            id=tool_call.id,
+                            type="function",
+                            function=chat_completion_chunk.ChoiceDeltaToolCallFunction(
+                                name=tool_call.function.name, arguments=tool_call.function.arguments,
+                            ),
+                        )
+                        for index, tool_call in enumerate(choice.message.tool_calls or [])
+                    ] or None,
+                ),
+            )
+            for choice in response.choices
+        ],
+    )
+
+
+def chunks_to_response(chunks: Sequence[ModelResponseChunk]) -> ModelResponse:
+    """Assembles the chunks of a streamed response into a complete response.
+
+    The deltas are grouped by choice index, so every choice of the response is assembled. Chunks without choices,
+    such as the usage-only final chunk, only contribute their usage.
+
+    Args:
+        chunks: The streamed chunks, in the order they were received.
+
+    Returns:
+        A `ModelResponse` holding one assembled message per choice, ordered by choice index. It holds a single empty
+        message if no chunk carried any choice, so that a choice can always be selected.
+    """
+    choices: dict[int, dict[str, Any]] = {}
+    for chunk in chunks:
+        for choice in chunk.choices:
+            entry = choices.setdefault(choice.index, {"content": [], "tool_calls": {}, "finish_reason": None})
+            if choice.delta.content:
+                entry["content"].append(choice.delta.content)
+            for tool_call in choice.delta.tool_calls or []:
+                call = entry["tool_calls"].setdefault(tool_call.index, {"id": "", "name": "", "arguments": ""})
+                if tool_call.id:
+                    call["id"] = tool_call.id
+                if tool_call.function is not None:
+                    call["name"] += tool_call.function.name or ""
+                    call["arguments"] += tool_call.function.arguments or ""
+            if choice.finish_reason is not None:
+                entry["finish_reason"] = choice.finish_reason
+    if not choices:
+        choices[0] = {"content": [], "tool_calls": {}, "finish_reason": None}
+    usage = next((chunk.usage for chunk in reversed(chunks) if chunk.usage is not None), None)
+    return ModelResponse(
+        id=chunks[0].id if chunks else "",
+        created=chunks[0].created if chunks else 0,
+        model=chunks[0].model if chunks else "",
+        object="chat.completion",
+        usage=usage,
+        choices=[
+            Choice(
+                index=index,
+                finish_reason=entry["finish_reason"] or "stop",
+                message=AssistantMessage(
+                    role="assistant",
+                    content="".join(entry["content"]) or None,
+                    tool_calls=[
+                        ToolCall(
+                            id=call["id"],
+                            type="function",
+                            function=FunctionCall(name=call["name"], arguments=call["arguments"]),
+                        )
+                        for _, call in sorted(entry["tool_calls"].items())
+                    ] or None,
+                ),
+            )
+            for index, entry in sorted(choices.items())
+        ],
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_arguments(arguments: str) -> dict[str, Any]:
+    return orjson.loads(arguments)
@@ -5,59 +5,132 @@ import numpy as np
 from hslu.dlm03.rag import util
 
 
-def recall_at_k(
-        *, target_ranks: np.ndarray, k: np.ndarray, mask: np.ndarray | None = None,
-) -> np.ndarray:
-    """Calculates recall at k.
+def _prepare_at_k(
+        target_ranks: np.ndarray, k: np.ndarray | int, mask: np.ndarray | None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Aligns the target ranks, k values and mask for the metrics at k.
 
     Args:
         target_ranks: A numpy array of target ranks.
-        k: A numpy array or an integer representing the 'k' in recall@k.
-        mask: An optional numpy array to mask values.
+        k: A numpy array or an integer representing the 'k' values.
+        mask: An optional boolean numpy array to mask values, other dtypes are cast to boolean.
 
     Returns:
-        A numpy array with the recall at k values.
+        The target ranks, k values and boolean mask expanded to broadcast together.
     """
-    if mask is None:
-        mask = np.ones_like(target_ranks)
-    if isinstance(k, int):
-        k = np.array(k)
+    mask = np.ones(target_ranks.shape, dtype=np.bool_) if mask is None else mask.astype(np.bool_, copy=False)
+    if isinstance(k, int | np.integer):
+        return target_ranks, k, mask
     mask, _ = util.expand_match_broadcast(mask, k, sizes=(mask.ndim, k.ndim))
     target_ranks, k = util.expand_match_dims(
         target_ranks, k, sizes=(target_ranks.ndim, k.ndim),
     )
-    mask_sum = mask.sum(-2)
-    output = np.zeros(mask_sum.shape)
+    return target_ranks, k, mask
+
+
+def _check_out(out: np.ndarray | None, shape: tuple[int, ...]) -> np.ndarray:
+    """Returns a zeroed output buffer of the given shape, reusing `out` if provided.
+
+    Args:
+        out: An optional numpy array to write the results into.
+        shape: The expected shape of the results.
+
+    Returns:
+        `out` filled with zeros, or a new zero array if `out` is None.
+
+    Raises:
+        ValueError: If the shape of `out` does not match the expected shape.
+    """
+    if out is None:
+        return np.zeros(shape)
+    if out.shape != shape:
+        error_message = f"Expected an output array of shape {shape}, but got {out.shape}."
+        raise ValueError(error_message)
+    out.fill(0)
+    return out
+
+
+def _recall(hits: np.ndarray, mask: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """Calculates recall from the masked hits.
+
+    Args:
+        hits: A boolean numpy array of masked hits.
+        mask: A boolean numpy array to mask values.
+        out: An optional numpy array to write the results into.
+
+    Returns:
+        A numpy array with the recall values.
+    """
+    mask_sum = mask.sum(-2, dtype=np.int64)
+    output = _check_out(out, mask_sum.shape)
     return np.divide(
-        ((target_ranks <= k) * mask).sum(-2),
+        hits.sum(-2, dtype=np.int64),
         mask_sum,
         out=output,
         where=mask_sum > 0,
     )
 
 
+def recall_at_k(
+        *, target_ranks: np.ndarray, k: np.ndarray, mask: np.ndarray | None = None, out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Calculates recall at k.
+
+    Args:
+        target_ranks: A numpy array of target ranks.
+        k: A numpy array or an integer representing the 'k' in recall@k.
+        mask: An optional boolean numpy array to mask values.
+        out: An optional float numpy array to write the results into, e.g. to reuse a single buffer across the
+            queries of an evaluation loop. It must have the shape of the results.
+
+    Returns:
+        A numpy array with the recall at k values, `out` if it was provided.
+    """
+    target_ranks, k, mask = _prepare_at_k(target_ranks, k, mask)
+    return _recall((target_ranks <= k) & mask, mask, out)
+
+
 def precision_at_k(
-        *, target_ranks: np.ndarray, k: np.ndarray, mask: np.ndarray | None = None,
+        *, target_ranks: np.ndarray, k: np.ndarray, mask: np.ndarray | None = None, out: np.ndarray | None = None,
 ) -> np.ndarray:
     """Calculates precision at k.
 
     Args:
         target_ranks: A numpy array of target ranks.
         k: A numpy array or an integer
-        mask: An optional numpy array to mask values.
+        mask: An optional boolean numpy array to mask values.
+        out: An optional float numpy array to write the results into, e.g. to reuse a single buffer across the
+            queries of an evaluation loop. It must have the shape of the results.
 
     Returns:
-        A numpy array with the precision at k values.
+        A numpy array with the precision at k values, `out` if it was provided.
     """
-    if mask is None:
-        mask = np.ones_like(target_ranks)
-    if isinstance(k, int):
-        k = np.array(k)
-    mask, _ = util.expand_match_broadcast(mask, k, sizes=(mask.ndim, k.ndim))
-    target_ranks, k = util.expand_match_dims(
-        target_ranks, k, sizes=(target_ranks.ndim, k.ndim),
-    )
-    return ((target_ranks <= k) * mask / k).sum(-2)
+    target_ranks, k, mask = _prepare_at_k(target_ranks, k, mask)
+    precision = ((target_ranks <= k) & mask) / k
+    if out is not None:
+        _check_out(out, precision.shape[:-2] + precision.shape[-1:])
+    return precision.sum(-2, out=out)
+
+
+def recall_precision_at_k(
+        *, target_ranks: np.ndarray, k: np.ndarray, mask: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Calculates both recall and precision at k.
+
+    The inputs are aligned and compared against k only once, which is cheaper than calling `recall_at_k` and
+    `precision_at_k` separately.
+
+    Args:
+        target_ranks: A numpy array of target ranks.
+        k: A numpy array or an integer representing the 'k' values.
+        mask: An optional boolean numpy array to mask values.
+
+    Returns:
+        A tuple of numpy arrays with the recall at k and precision at k values.
+    """
+    target_ranks, k, mask = _prepare_at_k(target_ranks, k, mask)
+    hits = (target_ranks <= k) & mask
+    return _recall(hits, mask), (hits / k).sum(-2)
 
 
 def mean_rank(*, target_ranks: np.ndarray, mask: np.ndarray | None = None) -> np.ndarray:
@@ -75,24 +148,60 @@ def mean_rank(*, target_ranks: np.ndarray, mask: np.ndarray | None = None) -> np
     output = np.zeros(target_ranks.shape[:-1])
     mask_sum = mask.sum(-1)
     return np.divide(
-        (target_ranks * mask).sum(-1),
+        np.einsum("...i,...i->...", target_ranks, mask),
         mask_sum,
         out=output,
         where=mask_sum > 0,
     )
 
 
+def _rank_vectorized(targets: np.ndarray, rankings: np.ndarray) -> np.ndarray:
+    """Ranks targets by comparing every target with every ranked item at once.
+
+    The matches are enumerated in row-major order, so they are already grouped by target with ascending positions,
+    and the first occurrence of each target is a segmented minimum that needs no sorting.
+
+    Args:
+        targets: A numpy array of target items, broadcast to the batch shape.
+        rankings: A numpy array of ranked items, broadcast to the batch shape.
+
+    Returns:
+        A numpy array with the (1-indexed) ranks of the target items, or one past the length of the ranking for
+        targets missing from it.
+    """
+    matches = targets[..., :, None] == rankings[..., None, :]
+    rows, positions = np.nonzero(matches.reshape(targets.size, rankings.shape[-1]))
+    ranks = np.full(targets.size, rankings.shape[-1] + 1, dtype=np.int64)
+    if rows.size:
+        starts = np.flatnonzero(np.diff(rows, prepend=-1))
+        ranks[rows[starts]] = np.minimum.reduceat(positions, starts) + 1
+    return ranks.reshape(targets.shape)
+
+
 def rank(targets: np.ndarray, rankings: np.ndarray) -> np.ndarray:
     """Calculates the rank of target items within a ranked list.
 
+    Numeric items are compared all at once with vectorized numpy operations. Other items, such as strings in object
+    arrays, are looked up in a dictionary built once per ranked list, so that the lookup is linear in the number of
+    targets and ranked items.
+
     Args:
         targets: A numpy array of target items.
         rankings: A numpy array of ranked items.
 
     Returns:
-        A numpy array with the ranks of the target items.
+        A numpy array with the (1-indexed) ranks of the target items. Targets missing from the ranking are ranked one
+        past its length, so that they never count as hits at any k within the ranking.
     """
-    indices = np.where(targets[..., None, :] == rankings[..., :, None])
-    records = np.rec.fromarrays((*indices[:-2], indices[-1]))
-    order = np.argsort(records)
-    return indices[-2][order].reshape(targets.shape) + 1
+    batch_shape = np.broadcast_shapes(targets.shape[:-1], rankings.shape[:-1])
+    targets = np.broadcast_to(targets, (*batch_shape, targets.shape[-1]))
+    rankings = np.broadcast_to(rankings, (*batch_shape, rankings.shape[-1]))
+    if np.object_ not in (targets.dtype, rankings.dtype):
+        return _rank_vectorized(targets, rankings)
+    ranks = np.empty(targets.shape, dtype=np.int64)
+    missing = rankings.shape[-1] + 1
+    for index in np.ndindex(batch_shape):
+        ranking = rankings[index].tolist()
+        positions = dict(zip(reversed(ranking), range(len(ranking), 0, -1), strict=True))
+        ranks[index] = [positions.get(target, missing) for target in targets[index].tolist()]
+    return ranks
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from hslu.dlm03.rag import metrics, util
+
+
+def _reference_recall_at_k(*, target_ranks, k, mask=None):
+    """The original implementation of `metrics.recall_at_k`."""
+    if mask is None:
+        mask = np.ones_like(target_ranks)
+    if isinstance(k, int):
+        k = np.array(k)
+    mask, _ = util.expand_match_broadcast(mask, k, sizes=(mask.ndim, k.ndim))
+    target_ranks, k = util.expand_match_dims(target_ranks, k, sizes=(target_ranks.ndim, k.ndim))
+    mask_sum = mask.sum(-2)
+    output = np.zeros(mask_sum.shape)
+    return np.divide(((target_ranks <= k) * mask).sum(-2), mask_sum, out=output, where=mask_sum > 0)
+
+
+def _reference_precision_at_k(*, target_ranks, k, mask=None):
+    """The original implementation of `metrics.precision_at_k`."""
+    if mask is None:
+        mask = np.ones_like(target_ranks)
+    if isinstance(k, int):
+        k = np.array(k)
+    mask, _ = util.expand_match_broadcast(mask, k, sizes=(mask.ndim, k.ndim))
+    target_ranks, k = util.expand_match_dims(target_ranks, k, sizes=(target_ranks.ndim, k.ndim))
+    return ((target_ranks <= k) * mask / k).sum(-2)
+
+
+def _reference_rank(targets, rankings):
+    """The original implementation of `metrics.rank`, which requires every target to occur once in the ranking."""
+    indices = np.where(targets[..., None, :] == rankings[..., :, None])
+    records = np.rec.fromarrays((*indices[:-2], indices[-1]))
+    order = np.argsort(records)
+    return indices[-2][order].reshape(targets.shape) + 1
+
+
+def _random_ranking(rng, batch_shape, num_targets, num_items):
+    rankings = rng.permuted(np.broadcast_to(np.arange(num_items), (*batch_shape, num_items)), axis=-1)
+    targets = rng.permuted(rankings, axis=-1)[..., :num_targets]
+    return targets, rankings
+
+
+@pytest.mark.parametrize("batch_shape", [(), (20,), (4, 5)])
+def test_rank_matches_reference(batch_shape) -> None:
+    targets, rankings = _random_ranking(np.random.default_rng(0), batch_shape, 5, 30)
+    np.testing.assert_array_equal(metrics.rank(targets, rankings), _reference_rank(targets, rankings))
+
+
+@pytest.mark.parametrize("batch_shape", [(), (20,), (4, 5)])
+def test_rank_objects_matches_reference(batch_shape) -> None:
+    targets, rankings = _random_ranking(np.random.default_rng(0), batch_shape, 5, 30)
+    ranks = metrics.rank(targets.astype(str).astype(object), rankings.astype(str).astype(object))
+    np.testing.assert_array_equal(ranks, _reference_rank(targets, rankings))
+
+
+@pytest.mark.parametrize("k", [7, np.array(3), np.array([1, 5, 10]), np.array([[1, 2], [3, 4]])])
+@pytest.mark.parametrize("masked", [False, True])
+def test_recall_precision_at_k_match_reference(k, masked) -> None:
+    rng = np.random.default_rng(1)
+    targets, rankings = _random_ranking(rng, (20,), 5, 30)
+    target_ranks = metrics.rank(targets, rankings)
+    mask = None
+    if masked:
+        mask = (rng.random(target_ranks.shape) > 0.3).astype(np.float64)
+        mask[0] = 0
+    expected_recall = _reference_recall_at_k(target_ranks=target_ranks, k=k, mask=mask)
+    expected_precision = _reference_precision_at_k(target_ranks=target_ranks, k=k, mask=mask)
+    recall, precision = metrics.recall_precision_at_k(target_ranks=target_ranks, k=k, mask=mask)
+    np.testing.assert_allclose(recall, expected_recall)
+    np.testing.assert_allclose(precision, expected_precision)
+    np.testing.assert_allclose(metrics.recall_at_k(target_ranks=target_ranks, k=k, mask=mask), expected_recall)
+    np.testing.assert_allclose(metrics.precision_at_k(target_ranks=target_ranks, k=k, mask=mask),
+                               expected_precision)
+
+
+@pytest.mark.parametrize("dtype", [np.str_, np.object_])
+def test_rank_missing_targets(dtype) -> None:
+    ranks = metrics.rank(np.array([["a", "x"], ["c", "a"]], dtype=dtype), np.array([["a", "b", "c"]], dtype=dtype))
+    np.testing.assert_array_equal(ranks, [[1, 4], [3, 1]])
+
+
+def test_recall_precision_at_k_missing_targets() -> None:
+    target_ranks = metrics.rank(np.array([[1, 7]]), np.array([[1, 2, 3]]))
+    recall, precision = metrics.recall_precision_at_k(target_ranks=target_ranks, k=np.array([1, 3]))
+    np.testing.assert_allclose(recall, [[0.5, 0.5]])
+    np.testing.assert_allclose(precision, [[1., 1 / 3]])
+    np.testing.assert_allclose(metrics.recall_at_k(target_ranks=target_ranks, k=np.array([1])), [[0.5]])
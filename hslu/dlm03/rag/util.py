@@ -1,5 +1,6 @@
 """Utility functions for working with numpy arrays."""
 
+import itertools
 from collections.abc import Sequence
 from typing import ParamSpec, TypeVar
 
@@ -35,13 +36,17 @@ def expand_match_dims(*arrays: np.ndarray, sizes: Sequence[int] | None = None) -
     elif len(sizes) != len(arrays):
         error_message = f"Expected {len(arrays)} sizes, but got {len(sizes)}."
         raise ValueError(error_message)
+    if len(arrays) <= 1 or not any(sizes):
+        # No array needs room for another array's dimensions, so they are already aligned.
+        return list(arrays)
     keep = (slice(None),)
     new = (None,)
+    ends = list(itertools.accumulate(sizes))
+    total_dims = ends[-1]
     new_arrays = []
-    for i, array in enumerate(arrays):
-        prefix_dims = sum(sizes[:i])
-        suffix_dims = sum(sizes[i + 1:])
-        keep_dims = sizes[i]
+    for array, keep_dims, end in zip(arrays, sizes, ends, strict=True):
+        prefix_dims = end - keep_dims
+        suffix_dims = total_dims - end
         new_arrays.append(array[*(new * prefix_dims), *(keep * keep_dims), *(new * suffix_dims), ...])
     return new_arrays
 
@@ -60,22 +65,16 @@ def expand_match_broadcast(*arrays: np.ndarray, sizes: Sequence[int] | None = No
             from each array's `ndim` attribute.
 
     Returns:
-        A list of new numpy arrays that have been expanded and broadcast
-        to a common shape.
+        A list of read-only broadcast views of the input arrays that have
+        been expanded to a common shape.
     """
     if sizes is None:
         sizes = [array.ndim for array in arrays]
     base_shape = []
     for array, size in zip(arrays, sizes, strict=True):
         base_shape.extend(array.shape[:size])
-    arrays = expand_match_dims(*arrays, sizes=sizes)
-    new_arrays = []
-    for i, array in enumerate(arrays):
-        new_array = array
-        for j in range(sum(sizes[:i])):
-            new_array = new_array.repeat(base_shape[j], axis=j)
-        offset = sum(sizes[: i + 1])
-        for j in range(offset, offset + sum(sizes[i + 1:])):
-            new_array = new_array.repeat(base_shape[j], axis=j)
-        new_arrays.append(new_array)
-    return new_arrays
+    expanded_arrays = expand_match_dims(*arrays, sizes=sizes)
+    return [
+        np.broadcast_to(expanded_array, (*base_shape, *array.shape[size:]))
+        for array, expanded_array, size in zip(arrays, expanded_arrays, sizes, strict=True)
+    ]
@@ -1,8 +1,11 @@
-import json
+import glob
+import os
+import pathlib
 import subprocess
 from collections.abc import Sequence
+from stat import S_ISREG
 
-import dataclass_wizard
+import pydantic
 from pydantic import dataclasses
 
 from hslu.dlm03.util import unified_diff
@@ -51,11 +54,11 @@ class Fix:
     Attributes:
         applicability: A string indicating how applicable the fix is (e.g., "always", "sometimes").
         edits: A sequence of `Edit` objects that constitute the fix.
-        message: A human-readable message describing the fix.
+        message: A human-readable message describing the fix, if ruff provides one.
     """
     applicability: str
     edits: Sequence[Edit]
-    message: str
+    message: str | None
 
     def to_unified_diff(self, filename: str, lines: Sequence[str]) -> unified_diff.UnifiedDiff:
         hunks = [edit.to_unified_diff_hunk(lines) for edit in self.edits]
@@ -70,21 +73,22 @@ class Issue:
     Attributes:
         filename: The name of the file where the issue was found.
         cell: The cell number if the issue is in a notebook, otherwise None.
-        code: The unique code identifying the type of issue (e.g., "E123").
+        code: The unique code identifying the type of issue (e.g., "E123"), None for syntax errors.
         message: A human-readable description of the issue.
         location: The starting location of the issue.
         end_location: The ending location of the issue.
-        noqa_row: The row number where a '# noqa' comment could be placed to ignore this issue.
+        noqa_row: The row number where a '# noqa' comment could be placed to ignore this issue, None if the issue
+                  cannot be suppressed (e.g., syntax errors).
         url: An optional URL providing more information about the issue.
         fix: An optional `Fix` object suggesting how to resolve the issue.
     """
     filename: str
     cell: int | None
-    code: str
+    code: str | None
     message: str
     location: Location
     end_location: Location
-    noqa_row: int
+    noqa_row: int | None
     url: str | None
     fix: Fix | None
 
@@ -99,11 +103,57 @@ class Issues:
     issues: list[Issue]
 
 
-def lint(path: str) -> list[Issue]:
-    """Lints a Python file using ruff and returns a list of found issues.
+_ISSUES_ADAPTER = pydantic.TypeAdapter(list[Issue])
+_RUFF_CONFIG_FILES = ("pyproject.toml", "ruff.toml", ".ruff.toml")
+_FileKey = tuple[str, int, int]
+_LINT_CACHE: dict[tuple[tuple[str, ...], tuple[str, ...]], tuple[tuple[_FileKey, ...], list[Issue]]] = {}
+
+
+def _file_keys(files: Sequence[str]) -> tuple[_FileKey, ...] | None:
+    """Computes the cache key of a set of files from their modification times and sizes.
+
+    The ruff configuration files that may apply to the files, i.e. those in any of their parent directories, are part
+    of the key, so that editing the configuration invalidates the cached issues.
+
+    Args:
+        files: The files to compute the key of.
+
+    Returns:
+        A tuple of `(path, mtime_ns, size)` triples, one per file and existing configuration file, or None if any of
+        the files is not a regular file.
+    """
+    keys = []
+    directories = set()
+    for file in files:
+        try:
+            stat = pathlib.Path(file).stat()
+        except OSError:
+            return None
+        if not S_ISREG(stat.st_mode):
+            return None
+        keys.append((file, stat.st_mtime_ns, stat.st_size))
+        directories.update(pathlib.Path(file).resolve().parents)
+    for directory in sorted(directories):
+        for name in _RUFF_CONFIG_FILES:
+            config = directory / name
+            try:
+                stat = config.stat()
+            except OSError:
+                continue
+            keys.append((str(config), stat.st_mtime_ns, stat.st_size))
+    return tuple(keys)
+
+
+def lint(path: str | os.PathLike[str], *, args: Sequence[str] = ()) -> list[Issue]:
+    """Lints Python files using ruff and returns a list of found issues.
 
     Args:
-        path: The path to the file to lint.
+        path: The path to the file or directory to lint, may be a glob pattern (e.g., `src/**/*.py`).
+        args: Additional command line arguments to pass to `ruff check` (e.g., `["--select", "E"]`).
+
+    Results are cached per path and arguments, and reused as long as the modification time and size of every linted
+    file and of the ruff configuration files in their parent directories are unchanged. Directories are not cached
+    since their content cannot be tracked from their own metadata.
 
     Returns:
         A list of `Issue` objects, each representing a linting issue.
@@ -112,12 +162,21 @@ def lint(path: str) -> list[Issue]:
         RuntimeError: If the ruff process itself fails (e.g., due to configuration issues,
                       or if ruff returns an unexpected exit code other than 0 or 1).
     """
-    process = subprocess.run(
-        [f"ruff check --output-format=json {path}"],
-        capture_output=True, shell=True,
+    path = os.fspath(path)
+    files = tuple(sorted(glob.glob(path, recursive=True))) or (path,)  # noqa: PTH207
+    args = tuple(args)
+    key = _file_keys(files)
+    cached = _LINT_CACHE.get((files, args))
+    if key is not None and cached is not None and cached[0] == key:
+        return list(cached[1])
+    process = subprocess.run(  # noqa: S603
+        ["ruff", "check", "--output-format=json", *args, "--", *files],  # noqa: S607
+        capture_output=True,
         check=False,
     )
     if process.returncode not in {0, 1}:
         raise RuntimeError(process.stderr.decode("utf-8"))
-    data = json.loads(process.stdout)
-    return dataclass_wizard.fromlist(Issue, data)
+    issues = _ISSUES_ADAPTER.validate_json(process.stdout)
+    if key is not None:
+        _LINT_CACHE[files, args] = (key, issues)
+    return list(issues)
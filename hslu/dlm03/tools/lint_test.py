@@ -0,0 +1,79 @@
+import shutil
+
+import pytest
+
+from hslu.dlm03.tools import lint
+
+# Output of `ruff check --output-format=json` for a file containing `def f(:`.
+_SYNTAX_ERROR_JSON = b"""[
+  {
+    "cell": null,
+    "code": null,
+    "end_location": {"column": 8, "row": 1},
+    "filename": "/tmp/bad.py",
+    "fix": null,
+    "location": {"column": 7, "row": 1},
+    "message": "SyntaxError: Expected a parameter or the end of the parameter list",
+    "noqa_row": null,
+    "url": null
+  },
+  {
+    "cell": null,
+    "code": "F401",
+    "end_location": {"column": 10, "row": 1},
+    "filename": "/tmp/fx.py",
+    "fix": {
+      "applicability": "safe",
+      "edits": [{"content": "", "end_location": {"column": 1, "row": 2}, "location": {"column": 1, "row": 1}}],
+      "message": null
+    },
+    "location": {"column": 8, "row": 1},
+    "message": "`os` imported but unused",
+    "noqa_row": 1,
+    "url": "https://docs.astral.sh/ruff/rules/unused-import"
+  }
+]"""
+
+
+def test_decode_syntax_error() -> None:
+    syntax_error, unused_import = lint._ISSUES_ADAPTER.validate_json(_SYNTAX_ERROR_JSON)
+    assert syntax_error.code is None
+    assert syntax_error.noqa_row is None
+    assert syntax_error.fix is None
+    assert unused_import.code == "F401"
+    assert unused_import.fix is not None
+    assert unused_import.fix.message is None
+
+
+@pytest.mark.skipif(shutil.which("ruff") is None, reason="ruff is not installed")
+def test_lint_syntax_error(tmp_path) -> None:
+    path = tmp_path / "bad.py"
+    path.write_text("def f(:\n    pass\n")
+    issues = lint.lint(path)
+    assert issues
+    assert all(issue.code is None and issue.noqa_row is None for issue in issues)
+
+
+@pytest.mark.skipif(shutil.which("ruff") is None, reason="ruff is not installed")
+def test_lint_glob(tmp_path) -> None:
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text("import os\n")
+    (tmp_path / "pkg" / "b.py").write_text("import sys\n")
+    issues = lint.lint(tmp_path / "**" / "*.py")
+    assert {issue.filename.rsplit("/", 1)[-1] for issue in issues if issue.code == "F401"} == {"a.py", "b.py"}
+
+
+@pytest.mark.skipif(shutil.which("ruff") is None, reason="ruff is not installed")
+def test_lint_config_change_invalidates_cache(tmp_path) -> None:
+    (tmp_path / "a.py").write_text("import os\n")
+    assert "F401" in {issue.code for issue in lint.lint(tmp_path / "a.py")}
+    (tmp_path / "ruff.toml").write_text('lint.select = ["E"]\n')
+    assert lint.lint(tmp_path / "a.py") == []
+
+
+@pytest.mark.skipif(shutil.which("ruff") is None, reason="ruff is not installed")
+def test_lint_args(tmp_path) -> None:
+    (tmp_path / "a.py").write_text("import os\n")
+    assert "F401" in {issue.code for issue in lint.lint(tmp_path / "a.py")}
+    assert lint.lint(tmp_path / "a.py", args=["--select", "E"]) == []
+    assert "F401" in {issue.code for issue in lint.lint(tmp_path / "a.py")}
@@ -1,6 +1,7 @@
 """Utility functions for IPython/Jupyter environments."""
 import asyncio
 import difflib
+import functools
 import html
 import pathlib
 import traceback
@@ -16,6 +17,32 @@ from hslu.dlm03.common.displays import ipython_display
 from hslu.dlm03.tools import lint
 from hslu.dlm03.util import unified_diff
 
+_DEL_STYLE = 'style="background-color: #ffe9e9;"'
+_ADD_STYLE = 'style="background-color: #e9ffe9;"'
+_ISSUE_STYLE = 'style="background-color: #ffffd0; border-left: 3px solid #f0c000;"'
+_NUM_STYLE = 'style="text-align: right; padding-right: 5px; color: #888; user-select: none;"'
+_CODE_STYLE = 'style="margin: 0; padding: 0 5px; white-space: pre;"'
+_GAP_STYLE = 'style="color: #888; text-align: center; user-select: none;"'
+
+# Row templates of the `display_issues` table, with the styles already substituted.
+_EQUAL_ROW_TPL = (f"<tr><td {_NUM_STYLE}>{{la}}</td><td><pre {_CODE_STYLE}>{{line}}</pre></td>"
+                  f"<td {_NUM_STYLE}>{{lb}}</td><td><pre {_CODE_STYLE}>{{line}}</pre></td></tr>")
+_DEL_ROW_TPL = (f"<tr><td {_NUM_STYLE}>{{la}}</td><td {_DEL_STYLE}><pre {_CODE_STYLE}>{{line}}</pre></td>"
+                f"<td {_NUM_STYLE}></td><td {_DEL_STYLE}></td></tr>")
+_ADD_ROW_TPL = (f"<tr><td {_NUM_STYLE}></td><td {_ADD_STYLE}></td>"
+                f"<td {_NUM_STYLE}>{{lb}}</td><td {_ADD_STYLE}><pre {_CODE_STYLE}>{{line}}</pre></td></tr>")
+_ISSUE_ANNOT_TPL = (f'\n<tr><td></td><td {_ISSUE_STYLE} colspan="3">'
+                    "{code}{message}</td></tr>")
+_ISSUE_CODE_TPL = "<strong>[{code}]</strong> "
+_GAP_ROW = f'<tr><td {_GAP_STYLE} colspan="4">...</td></tr>\n'
+_TABLE_HEAD = ('<table style="font-family: monospace; width: 100%; border-collapse: collapse;">'
+               "<thead><tr>"
+               '<th style="width: 40px; text-align: right; padding-right: 5px;"></th>'
+               '<th style="text-align: left;">Before</th>'
+               '<th style="width: 40px; text-align: right; padding-right: 5px;"></th>'
+               '<th style="text-align: left;">After</th>'
+               "</tr></thead>\n")
+
 
 def display_agent(agent: agent_lib.Agent, chat: chat_lib.Chat | None = None) -> None:
     if chat is None:
@@ -39,6 +66,21 @@ def display_agent(agent: agent_lib.Agent, chat: chat_lib.Chat | None = None) ->
     ipydisplay.display(box)
 
 
+@functools.lru_cache(maxsize=32)
+def _get_opcodes(
+        original_lines: tuple[str, ...],
+        new_lines: tuple[str, ...],
+        num_lines: int,
+) -> tuple[list[tuple[str, int, int, int, int]], ...]:
+    """Computes the grouped diff opcodes between two versions of a file.
+
+    The result is cached on the line contents themselves, so issues rendered against the same file content share a
+    single `difflib.SequenceMatcher` run, and any change to the file naturally misses the cache.
+    """
+    matcher = difflib.SequenceMatcher(a=original_lines, b=new_lines)
+    return tuple(matcher.get_grouped_opcodes(n=num_lines))
+
+
 def display_issues(
         widget: ipywidgets.HTML,
         content: str,
@@ -51,110 +93,41 @@ def display_issues(
 
     Highlights changes and annotates the original issue location.
     """
-    original_lines = content.splitlines()
-    new_lines = fix(content, strict=strict).splitlines()
+    original_lines = tuple(content.splitlines())
+    new_lines = tuple(fix(content, strict=strict).splitlines())
     if num_lines is None:
         num_lines = max(len(original_lines), len(new_lines))
     issue_rows = set(range(issue.location.row, issue.end_location.row + 1))
-    matcher = difflib.SequenceMatcher(a=original_lines, b=new_lines)
-
-    grouped_opcodes = matcher.get_grouped_opcodes(n=num_lines)
-
-    html_rows = ['<thead><tr>'
-                 '<th style="width: 40px; text-align: right; padding-right: 5px;"></th>'
-                 '<th style="text-align: left;">Before</th>'
-                 '<th style="width: 40px; text-align: right; padding-right: 5px;"></th>'
-                 '<th style="text-align: left;">After</th>'
-                 '</tr></thead>']
-
-    style = {
-        "del": 'style="background-color: #ffe9e9;"',
-        "add": 'style="background-color: #e9ffe9;"',
-        "issue": 'style="background-color: #ffffd0; border-left: 3px solid #f0c000;"',
-        "num": 'style="text-align: right; padding-right: 5px; color: #888; user-select: none;"',
-        "code": 'style="margin: 0; padding: 0 5px; white-space: pre;"',
-        "gap": 'style="color: #888; text-align: center; user-select: none;"',
-    }
-
-    last_a_line = 0
-    html_rows.append("<tbody>")
-    for group in grouped_opcodes:
-        if group[0][1] > last_a_line:
-            html_rows.append(
-                f'<tr><td {style["gap"]} colspan="4">...</td></tr>',
-            )
-        last_a_line = group[-1][2]
-
-        for tag, i1, i2, j1, j2 in group:
-            if tag == "equal":
-                for k in range(i1, i2):
-                    line_num_a = k + 1
-                    line_num_b = (j1 + (k - i1)) + 1
-                    line_a = html.escape(original_lines[k].rstrip("\n"))
-
-                    html_rows.append(
-                        f'<tr>'
-                        f'<td {style["num"]}>{line_num_a}</td>'
-                        f'<td><pre {style["code"]}>{line_a}</pre></td>'
-                        f'<td {style["num"]}>{line_num_b}</td>'
-                        f'<td><pre {style["code"]}>{line_a}</pre></td>'
-                        f'</tr>',
-                    )
-
-                    if line_num_a in issue_rows:
-                        html_rows.append(
-                            f'<tr>'
-                            f'<td></td>'
-                            f'<td {style["issue"]} colspan="3">'
-                            f'<strong>[{issue.code}]</strong> {html.escape(issue.message)}'
-                            f'</td>'
-                            f'</tr>',
-                        )
-
-            if tag == "delete" or tag == "replace":
-                for k in range(i1, i2):
-                    line_num_a = k + 1
-                    line_a = html.escape(original_lines[k].rstrip("\n"))
-
-                    html_rows.append(
-                        f'<tr>'
-                        f'<td {style["num"]}>{line_num_a}</td>'
-                        f'<td {style["del"]}><pre {style["code"]}>{line_a}</pre></td>'
-                        f'<td {style["num"]}></td>'
-                        f'<td {style["del"]}></td>'
-                        f'</tr>',
-                    )
-
-                    if line_num_a in issue_rows:
-                        html_rows.append(
-                            f'<tr>'
-                            f'<td></td>'
-                            f'<td {style["issue"]} colspan="3">'
-                            f'<strong>[{issue.code}]</strong> {html.escape(issue.message)}'
-                            f'</td>'
-                            f'</tr>',
-                        )
-
-            if tag == "insert" or tag == "replace":
-                for k in range(j1, j2):
-                    line_num_b = k + 1
-                    line_b = html.escape(new_lines[k].rstrip("\n"))
-
-                    html_rows.append(
-                        f'<tr>'
-                        f'<td {style["num"]}></td>'
-                        f'<td {style["add"]}></td>'
-                        f'<td {style["num"]}>{line_num_b}</td>'
-                        f'<td {style["add"]}><pre {style["code"]}>{line_b}</pre></td>'
-                        f'</tr>',
-                    )
-
-    html_rows.append("</tbody>")
-    final_html = (
-            '<table style="font-family: monospace; width: 100%; border-collapse: collapse;">'
-            + "\n".join(html_rows)
-            + "</table>"
+    grouped_opcodes = _get_opcodes(original_lines, new_lines, num_lines)
+
+    escaped_orig = list(map(html.escape, (line.rstrip("\n") for line in original_lines)))
+    escaped_new = list(map(html.escape, (line.rstrip("\n") for line in new_lines)))
+
+    code = _ISSUE_CODE_TPL.format(code=issue.code) if issue.code is not None else ""
+    annotation = _ISSUE_ANNOT_TPL.format(code=code, message=html.escape(issue.message))
+
+    def annotate(index: int) -> str:
+        return annotation if index + 1 in issue_rows else ""
+
+    def render_group(group: list[tuple[str, int, int, int, int]]) -> str:
+        return "\n".join(
+            "\n".join(
+                _EQUAL_ROW_TPL.format(la=k + 1, lb=j1 + (k - i1) + 1, line=escaped_orig[k]) + annotate(k)
+                for k in range(i1, i2)
+            ) if tag == "equal" else "\n".join((
+                *(_DEL_ROW_TPL.format(la=k + 1, line=escaped_orig[k]) + annotate(k) for k in range(i1, i2)),
+                *(_ADD_ROW_TPL.format(lb=k + 1, line=escaped_new[k]) for k in range(j1, j2)),
+            ))
+            for tag, i1, i2, j1, j2 in group
+            if i1 < i2 or j1 < j2
+        )
+
+    starts = [0, *(group[-1][2] for group in grouped_opcodes)]
+    body = "".join(
+        (_GAP_ROW if group[0][1] > last_a_line else "") + render_group(group) + "\n"
+        for group, last_a_line in zip(grouped_opcodes, starts, strict=False)
     )
+    final_html = f"{_TABLE_HEAD}<tbody>\n{body}</tbody></table>"
     widget.value = final_html
     return final_html
 
@@ -1,25 +1,41 @@
 """Provides a decorator for rate-limiting function calls."""
+import asyncio
 import functools
+import inspect
+import math
 import threading
 import time
 import types
-from collections import deque
 from collections.abc import Callable
 from typing import ParamSpec, Self, TypeVar
 
 Param = ParamSpec("Param")
 RetType = TypeVar("RetType")
 
+_WINDOW_NS = 60_000_000_000
+# Rates at or above this many calls per minute cannot be reached by remote API calls and are treated as no limit.
+_UNLIMITED_RPM = 1_000_000
+_INITIAL_BUFFER_SIZE = 64
+
 
 class RateLimiter:
     """A thread-safe rate limiter that enforces a maximum number of calls per minute (RPM).
 
     It uses a sliding window algorithm to allow bursts of calls while ensuring the
-    average rate does not exceed the specified RPM.
+    average rate does not exceed the specified RPM. The timestamps of the calls
+    in the window are stored in a ring buffer, which grows as needed up to
+    `rpm` entries, since there can never be more of them. An infinite or very
+    large RPM (see `_UNLIMITED_RPM`) disables the limit. Blocked threads queue
+    on a condition variable: only one of them sleeps until the next slot frees
+    up, and each successful acquisition wakes a single successor.
     """
-    _calls: deque[float]
-    _lock: threading.Lock
+    _calls: list[int]
+    _head: int
+    _count: int
+    _cond: threading.Condition
+    _has_sleeper: bool
     _rpm: float
+    _unlimited: bool
 
     def __init__(self, rpm: float) -> None:
         """Initializes a `RateLimiter` instance.
@@ -27,27 +43,78 @@ class RateLimiter:
         Args:
             rpm: The maximum number of requests per minute.
         """
-        self._calls = deque()
-        self._lock = threading.Lock()
+        self._unlimited = rpm >= _UNLIMITED_RPM
+        self._calls = [0] * (1 if self._unlimited else max(min(math.ceil(rpm), _INITIAL_BUFFER_SIZE), 1))
+        self._head = 0
+        self._count = 0
+        self._cond = threading.Condition(threading.Lock())
+        self._has_sleeper = False
         self._rpm = rpm
 
+    def _poll(self) -> float | None:
+        """Tries to acquire a permit from the rate limiter, the condition's lock must be held.
+
+        Returns:
+            None if a permit was acquired, otherwise the time to wait in seconds before trying again.
+        """
+        current_time = time.monotonic_ns()
+        window_start = current_time - _WINDOW_NS
+
+        while self._count and self._calls[self._head] <= window_start:
+            self._head = (self._head + 1) % len(self._calls)
+            self._count -= 1
+
+        if self._count < self._rpm:
+            if self._count == len(self._calls):
+                # Unroll the full ring buffer and double its size, without exceeding the number of calls per window.
+                size = min(2 * len(self._calls), math.ceil(self._rpm))
+                self._calls = [*self._calls[self._head:], *self._calls[:self._head], *[0] * (size - self._count)]
+                self._head = 0
+            self._calls[(self._head + self._count) % len(self._calls)] = current_time
+            self._count += 1
+            return None
+
+        return (self._calls[self._head] - window_start) / 1e9
+
+    def _try_acquire(self) -> float | None:
+        """Tries to acquire a permit from the rate limiter.
+
+        Returns:
+            None if a permit was acquired, otherwise the time to wait in seconds before trying again.
+        """
+        with self._cond:
+            return self._poll()
+
     def acquire(self) -> None:
         """Acquire a permit from the rate limiter or wait if the limit is reached."""
+        if self._unlimited:
+            return
+        with self._cond:
+            try:
+                while (time_to_wait := self._poll()) is not None:
+                    if self._has_sleeper:
+                        self._cond.wait()
+                        continue
+                    self._has_sleeper = True
+                    try:
+                        self._cond.wait(timeout=time_to_wait)
+                    finally:
+                        self._has_sleeper = False
+            finally:
+                self._cond.notify()
+
+    async def aacquire(self) -> None:
+        """Acquire a permit from the rate limiter or asynchronously wait if the limit is reached.
+
+        Only the submission of a call is rate-limited, the permit does not need to be held until the call completes.
+        """
+        if self._unlimited:
+            return
         while True:
-            with self._lock:
-                current_time = time.monotonic()
-
-                while self._calls and self._calls[0] <= current_time - 60:
-                    self._calls.popleft()
-
-                if len(self._calls) < self._rpm:
-                    self._calls.append(current_time)
-                    break
-
-                time_to_wait = self._calls[0] - (current_time - 60)
-
-            if time_to_wait > 0:
-                time.sleep(time_to_wait)
+            time_to_wait = self._try_acquire()
+            if time_to_wait is None:
+                return
+            await asyncio.sleep(max(time_to_wait, 0))
 
     def __enter__(self) -> Self:
         """Enters the rate limiter context."""
@@ -64,6 +131,9 @@ def ratelimit(
 ) -> Callable[[Callable[Param, RetType]], Callable[Param, RetType]]:
     """Decorator that limits the rate at which a function can be called.
 
+    Coroutine functions are wrapped in a coroutine function that waits for a permit with `asyncio.sleep`, so that
+    the event loop is not blocked while the rate limit is reached.
+
     Args:
         rpm: The maximum number of requests per minute. If None, no rate
              limiting is applied.
@@ -76,6 +146,14 @@ def ratelimit(
     rate_limiter = RateLimiter(rpm)
 
     def decorator(func: Callable[Param, RetType]) -> Callable[Param, RetType]:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Param.args, **kwargs: Param.kwargs) -> RetType:
+                await rate_limiter.aacquire()
+                return await func(*args, **kwargs)
+
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args: Param.args, **kwargs: Param.kwargs) -> RetType:
             with rate_limiter:
@@ -0,0 +1,115 @@
+import asyncio
+import math
+import threading
+import time
+import types
+
+import pytest
+
+from hslu.dlm03.util import ratelimit
+
+_WINDOW_NS = 200_000_000
+
+
+class _Clock:
+    """Records the last timestamp read by each thread, i.e. the time at which its last permit was acquired."""
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+
+    def monotonic_ns(self) -> int:
+        self._local.last = time.monotonic_ns()
+        return self._local.last
+
+    def last(self) -> int:
+        return self._local.last
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(ratelimit, "time", types.SimpleNamespace(monotonic_ns=clock.monotonic_ns))
+    monkeypatch.setattr(ratelimit, "_WINDOW_NS", _WINDOW_NS)
+    return clock
+
+
+def test_threads_and_tasks_respect_rpm(clock) -> None:
+    rpm = 5
+    limiter = ratelimit.RateLimiter(rpm)
+    timestamps = []
+    lock = threading.Lock()
+
+    def record() -> None:
+        with lock:
+            timestamps.append(clock.last())
+
+    def acquire() -> None:
+        limiter.acquire()
+        record()
+
+    async def aacquire() -> None:
+        await limiter.aacquire()
+        record()
+
+    async def run_tasks() -> None:
+        await asyncio.gather(*(aacquire() for _ in range(8)))
+
+    threads = [threading.Thread(target=acquire) for _ in range(12)]
+    threads.append(threading.Thread(target=asyncio.run, args=(run_tasks(),)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(timestamps) == 20
+    timestamps.sort()
+    # Any rpm + 1 consecutive permits span at least a full window.
+    assert all(later - earlier >= _WINDOW_NS for earlier, later in zip(timestamps, timestamps[rpm:]))
+
+
+def test_waiter_wakes_when_slot_expires(clock) -> None:
+    limiter = ratelimit.RateLimiter(1)
+    limiter.acquire()
+    first = clock.last()
+    acquired = []
+    waiter = threading.Thread(target=lambda: (limiter.acquire(), acquired.append(clock.last())))
+    waiter.start()
+    waiter.join(timeout=10 * _WINDOW_NS / 1e9)
+    assert acquired
+    assert _WINDOW_NS <= acquired[0] - first < 5 * _WINDOW_NS
+
+
+def test_decorator_limits_coroutines(clock) -> None:
+    timestamps = []
+
+    @ratelimit.ratelimit(rpm=2)
+    async def call() -> None:
+        timestamps.append(clock.last())
+
+    async def run() -> None:
+        await asyncio.gather(*(call() for _ in range(4)))
+
+    asyncio.run(run())
+    assert timestamps[2] - timestamps[0] >= _WINDOW_NS
+    assert timestamps[3] - timestamps[1] >= _WINDOW_NS
+
+
+@pytest.mark.parametrize("rpm", [1e6, math.inf])
+def test_unlimited(rpm) -> None:
+    limiter = ratelimit.RateLimiter(rpm)
+    assert len(limiter._calls) <= 1
+    for _ in range(1000):
+        limiter.acquire()
+    asyncio.run(limiter.aacquire())
+
+
+def test_buffer_grows_up_to_rpm(clock) -> None:
+    rpm = 200
+    limiter = ratelimit.RateLimiter(rpm)
+    assert len(limiter._calls) < rpm
+    timestamps = []
+    for _ in range(rpm + 1):
+        limiter.acquire()
+        timestamps.append(clock.last())
+    assert len(limiter._calls) == rpm
+    assert timestamps[rpm] - timestamps[0] >= _WINDOW_NS
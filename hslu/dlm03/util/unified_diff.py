@@ -1,23 +1,36 @@
 """Provides classes for parsing and applying unified diff patches."""
+import collections
 import dataclasses
 import difflib
+import itertools
 import pathlib
 import re
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
 
+# Matches both the file header lines and the hunk header lines, the named groups tell which kind of line matched.
+# The line numbers of the headers are ASCII digits, so the pattern does not need unicode character classes.
+# The pattern spans whole lines and only uses possessive quantifiers, so that matching never backtracks.
 _UNIFIED_DIFF_HEADER_REGEX = re.compile(
-    r"(?P<type>---|\+\+\+) (?P<file>[^\t]*)(?:\t(?P<timestamp>.*))?",
-)
-_UNIFIED_DIFF_HUNK_HEADER_REGEX = re.compile(
-    r"@@ -(?P<from_line>\d+)(?:,(?P<from_count>\d+))? \+(?P<to_line>\d+)(?:,(?P<to_count>\d+))? @@(?: (?:.*))?",
+    r"""
+    ^(?:
+        ---\ (?P<from_file>[^\t\r\n]*+)(?:\t[^\r\n]*+)?
+      | \+\+\+\ (?P<to_file>[^\t\r\n]*+)(?:\t[^\r\n]*+)?
+      | @@\ -(?P<from_line>\d++)(?:,(?P<from_count>\d++))?\ \+(?P<to_line>\d++)(?:,(?P<to_count>\d++))?\ @@
+        (?:\ [^\r\n]*+)?
+    )\r?$
+    """,
+    flags=re.ASCII | re.MULTILINE | re.VERBOSE,
 )
+_UNIFIED_DIFF_HUNK_LINE_PREFIXES = frozenset(" +-")
+# Hunks with more lines than this are compared as joined strings when their lines are not shared with the content.
+_JOINED_COMPARE_MIN_LINES = 64
 
 
 class UnifiedDiffError(Exception):
     """Custom exception for unified diff parsing and applying errors."""
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class UnifiedDiffHunk:
     """Represents a single hunk in a unified diff patch."""
     from_line: int
@@ -32,6 +45,8 @@ class UnifiedDiffHunk:
     """The lines in the hunk from the original file."""
     after: list[str]
     """The lines in the hunk from the new file."""
+    _before_joined: str | None = dataclasses.field(default=None, init=False, repr=False, compare=False)
+    """The lines of `before` joined by newlines, computed on first use, `before` must not be mutated afterwards."""
 
     @classmethod
     def from_lines(cls, lines: Sequence[str]) -> "UnifiedDiffHunk":
@@ -48,10 +63,26 @@ class UnifiedDiffHunk:
             UnifiedDiffError: If a hunk line has an invalid prefix.
         """
         header, lines = lines[0], lines[1:]
-        match = _UNIFIED_DIFF_HUNK_HEADER_REGEX.match(header)
-        if not match:
+        match = _UNIFIED_DIFF_HEADER_REGEX.fullmatch(header)
+        if not match or match.group("from_line") is None:
             error_message = f"Invalid unified diff hunk header: {header}"
             raise ValueError(error_message)
+        return cls._from_components(match, lines)
+
+    @classmethod
+    def _from_components(cls, match: re.Match[str], lines: Sequence[str]) -> "UnifiedDiffHunk":
+        """Creates a UnifiedDiffHunk from an already matched hunk header and the lines of its body.
+
+        Args:
+            match: The match of the hunk header.
+            lines: A sequence of lines representing the hunk body, without the header.
+
+        Returns:
+            A UnifiedDiffHunk object.
+
+        Raises:
+            UnifiedDiffError: If a hunk line has an invalid prefix.
+        """
         from_line = int(match.group("from_line"))
         from_count = (
             int(match.group("from_count"))
@@ -62,21 +93,14 @@ class UnifiedDiffHunk:
         to_count = (
             int(match.group("to_count")) if match.group("to_count") is not None else 1
         )
-        before = []
-        after = []
-        for line in lines:
-            prefix, content = line[0], line[1:]
-            match prefix:
-                case " ":
-                    before.append(content)
-                    after.append(content)
-                case "+":
-                    after.append(content)
-                case "-":
-                    before.append(content)
-                case _:
-                    error_message = f"Invalid unified diff hunk line prefix: {prefix}"
-                    raise UnifiedDiffError(error_message)
+        invalid = next((line for line in lines if line[:1] not in _UNIFIED_DIFF_HUNK_LINE_PREFIXES), None)
+        if invalid is not None:
+            error_message = f"Invalid unified diff hunk line prefix: {invalid[:1]}"
+            raise UnifiedDiffError(error_message)
+        # Each line is sliced once, so context lines share the same string in `before` and `after`.
+        contents = [line[1:] for line in lines]
+        before = [content for line, content in zip(lines, contents, strict=True) if line[0] != "+"]
+        after = [content for line, content in zip(lines, contents, strict=True) if line[0] != "-"]
         return cls(from_line, from_count, to_line, to_count, before, after)
 
     @classmethod
@@ -92,6 +116,20 @@ class UnifiedDiffHunk:
         lines = string.splitlines()
         return cls.from_lines(lines)
 
+    def _span(self, offset: int = 0) -> tuple[int, int]:
+        """Computes the indices of the lines replaced by the hunk.
+
+        Args:
+            offset: The line offset to apply.
+
+        Returns:
+            The start and end indices of the replaced lines, a pure insertion has an empty span after `from_line`.
+        """
+        start = self.from_line + offset
+        if self.from_count > 0:
+            start -= 1
+        return start, start + self.from_count
+
     def verify(self, content: Sequence[str], offset: int = 0) -> None:
         """Verifies that the hunk can be applied to the given content.
 
@@ -109,29 +147,66 @@ class UnifiedDiffHunk:
         if len(self.after) != self.to_count:
             error_message = f"Invalid unified diff hunk: expected {self.to_count} lines after, got {len(self.after)}"
             raise UnifiedDiffError(error_message)
-
-        start_index = self.from_line
-        if self.from_count > 0:
-            start_index -= 1
-
-        start = start_index + offset
-        end = start + self.from_count
-
-        before_diff = "\n".join(
-            difflib.unified_diff(
-                content[start:end],
-                self.before,
-                n=0,
-                fromfile="original",
-                tofile="expected",
-                lineterm="",
-            ),
-        )
-        if before_diff:
+        if self.from_count == 0:
+            # A pure insertion does not replace any line, so there is no content to compare.
+            return
+
+        start, end = self._span(offset)
+
+        actual = list(content[start:end])
+        if not self._matches(actual):
+            # The diff is only needed to explain the mismatch, the check itself is a plain list comparison.
+            before_diff = "\n".join(
+                difflib.unified_diff(
+                    actual,
+                    self.before,
+                    n=0,
+                    fromfile="original",
+                    tofile="expected",
+                    lineterm="",
+                ),
+            )
             error_message = ("Cannot apply unified diff on given content, original content does not match expected "
                              f"unified diff content:\n{before_diff}")
             raise UnifiedDiffError(error_message)
 
+    def _matches(self, actual: list[str]) -> bool:
+        """Checks whether the given lines are the lines of `before`.
+
+        Large hunks whose lines are not the very same strings as the content are compared as a single
+        joined string, which compares characters in one call instead of one string comparison per line.
+
+        Args:
+            actual: The lines of the content replaced by the hunk.
+
+        Returns:
+            Whether the lines match.
+        """
+        if len(actual) != len(self.before):
+            return False
+        if len(actual) <= _JOINED_COMPARE_MIN_LINES or actual[0] is self.before[0]:
+            return actual == self.before
+        if self._before_joined is None:
+            self._before_joined = "\n".join(self.before)
+        return "\n".join(actual) == self._before_joined
+
+    def _fits(self, content: Sequence[str], offset: int = 0) -> bool:
+        """Checks whether the hunk can be applied at its own position, like `verify` but without raising.
+
+        Args:
+            content: The content to check against.
+            offset: The line offset to apply.
+
+        Returns:
+            Whether `verify` would succeed.
+        """
+        if len(self.before) != self.from_count or len(self.after) != self.to_count:
+            return False
+        if self.from_count == 0:
+            return True
+        start, end = self._span(offset)
+        return self._matches(list(content[start:end]))
+
     def apply(self, content: list[str], offset: int = 0) -> int:
         """Applies the hunk to the given content.
 
@@ -143,21 +218,18 @@ class UnifiedDiffHunk:
             The new offset after applying the hunk.
         """
         self.verify(content, offset)
-        start_index = self.from_line
-        if self.from_count > 0:
-            start_index -= 1
-
-        start = start_index + offset
-        end = start + self.from_count
+        start, end = self._span(offset)
 
         content[start:end] = self.after
         return self.to_count - self.from_count
 
-    def find(self, lines: Sequence[str]) -> "UnifiedDiffHunk":
+    def find(self, lines: Sequence[str], index: Mapping[str, Sequence[int]] | None = None) -> "UnifiedDiffHunk":
         """Finds the hunk in the given content.
 
         Args:
             lines: The content to find the hunk in.
+            index: An optional mapping from each line of the content to its positions in increasing order, as built by
+                `line_index`. It avoids scanning the whole content when searching for several hunks.
 
         Returns:
             The hunk in the given content.
@@ -165,17 +237,26 @@ class UnifiedDiffHunk:
         Raises:
             UnifiedDiffError: If the hunk cannot be found.
         """
-        matcher = difflib.SequenceMatcher(None, lines, self.before)
-        match = matcher.find_longest_match(0, len(lines), 0, len(self.before))
-        if match.size != len(self.before):
+        if not self.before:
+            # A pure insertion has no anchor in the content, it can only be placed at its own position.
+            return self
+        first, size = self.before[0], len(self.before)
+        candidates = (
+            index.get(first, ()) if index is not None
+            else (position for position, line in enumerate(lines) if line == first)
+        )
+        position = next(
+            (position for position in candidates if list(lines[position:position + size]) == self.before), None,
+        )
+        if position is None:
             error_message = "Could not find hunk in content."
             raise UnifiedDiffError(error_message)
-        offset = (match.a + 1) - self.from_line
+        offset = (position + 1) - self.from_line
         return UnifiedDiffHunk(self.from_line + offset, len(self.before), self.to_line + offset, len(self.after),
                                self.before, self.after)
 
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(slots=True)
 class UnifiedDiff:
     """Represents a UnifiedDiff patch."""
     from_file: str
@@ -198,56 +279,104 @@ class UnifiedDiff:
         Raises:
             UnifiedDiffError: If the unified diff header is invalid.
         """
-        lines = string.splitlines()
-        header, lines = lines[:2], lines[2:]
         from_file = None
         to_file = None
-        for line in header:
-            match = _UNIFIED_DIFF_HEADER_REGEX.match(line)
-            if not match:
+        position = 0
+        for _ in range(2):
+            if position >= len(string):
+                break
+            end = string.find("\n", position)
+            if end == -1:
+                end = len(string)
+            line = string[position:end].removesuffix("\r")
+            position = end + 1
+            match = _UNIFIED_DIFF_HEADER_REGEX.fullmatch(line)
+            if not match or match.group("from_line") is not None:
                 error_message = f"Invalid unified diff header: {line}"
                 raise UnifiedDiffError(error_message)
-            header_type = match.group("type")
-            match header_type:
-                case "---":
-                    from_file = match.group("file")
-                case "+++":
-                    to_file = match.group("file")
-                case _:
-                    error_message = f"Invalid unified diff header type: {header_type}"
-                    raise UnifiedDiffError(error_message)
+            if match.group("from_file") is not None:
+                from_file = match.group("from_file")
+            else:
+                to_file = match.group("to_file")
+        # Scan the whole body for hunk headers at once, and only split the text between two headers into lines.
+        # Removed lines starting with "-- " look like file headers, they are part of the hunks and skipped here.
+        matches = [
+            match for match in _UNIFIED_DIFF_HEADER_REGEX.finditer(string, position)
+            if match.group("from_line") is not None
+        ]
+        boundaries = [*(match.start() for match in matches), len(string)]
         hunks = []
-        last = None
-        for i, line in enumerate(lines):
-            if _UNIFIED_DIFF_HUNK_HEADER_REGEX.match(line):
-                if last is not None:
-                    hunk = UnifiedDiffHunk.from_lines(lines[last:i])
-                    hunks.append(hunk)
-                last = i
-        if last is not None:
-            hunk = UnifiedDiffHunk.from_lines(lines[last:])
-            hunks.append(hunk)
+        for match, end in zip(matches, boundaries[1:], strict=True):
+            body_start = string.find("\n", match.end(), end) + 1 or end
+            hunks.append(UnifiedDiffHunk._from_components(match, string[body_start:end].splitlines()))  # noqa: SLF001
         return cls(from_file, to_file, hunks)
 
     def apply(self, content: list[str], *, strict: bool = True) -> list[str]:
-        """Applies the patch to the given content.
+        """Applies the patch to the given content in place.
 
         Args:
-            content: The content to apply the patch to, as a list of lines.
+            content: The content to apply the patch to, as a list of lines. It is modified in place.
             strict: Whether to apply the patch strictly (`True` by default) or to try to find the hunks in the file.
 
         Returns:
-            The patched content as a list of lines.
+            The patched content, i.e. the `content` list itself.
         """
+        if strict:
+            return self._apply_streaming(content)
         offset = 0
-        hunks = self.hunks if strict else [hunk.find(content) for hunk in self.hunks]
+        # Hunks that already fit where they claim to be are kept as they are, only the others are searched for.
+        index = None
+        hunks = []
+        for hunk in self.hunks:
+            if hunk._fits(content):  # noqa: SLF001
+                hunks.append(hunk)
+                continue
+            if index is None:
+                index = line_index(content)
+            hunks.append(hunk.find(content, index))
         for hunk in hunks:
             offset += hunk.apply(content, offset)
         return content
 
+    def _apply_streaming(self, content: list[str]) -> list[str]:
+        """Applies the patch by copying the content once, instead of splicing every hunk into it.
+
+        Splicing a hunk that changes the number of lines shifts the whole tail of the list, so the hunks are instead
+        verified against the original content and written to a new list together with the unchanged lines between
+        them, which then replaces the content in a single copy. All hunks are verified before anything is copied, so
+        a patch that does not fit fails without modifying the content. Hunks that are out of order or overlap are
+        spliced in one after the other.
+
+        Args:
+            content: The content to apply the patch to, as a list of lines. It is modified in place.
+
+        Returns:
+            The patched content, i.e. the `content` list itself.
+        """
+        spans = [hunk._span() for hunk in self.hunks]  # noqa: SLF001
+        if any(start < previous_end for (_, previous_end), (start, _) in itertools.pairwise([(0, 0), *spans])):
+            offset = 0
+            for hunk in self.hunks:
+                offset += hunk.apply(content, offset)
+            return content
+        for hunk in self.hunks:
+            hunk.verify(content)
+        patched = []
+        cursor = 0
+        for hunk, (start, end) in zip(self.hunks, spans, strict=True):
+            patched.extend(content[cursor:start])
+            patched.extend(hunk.after)
+            cursor = end
+        patched.extend(content[cursor:])
+        content[:] = patched
+        return content
+
     def __call__(self, content: str, *, strict: bool = True) -> str:
         """Applies the patch to the given content as a string.
 
+        Unchanged lines keep their own line ending, while added lines use the line ending of the line preceding them
+        (or the most common line ending of the content). A trailing line ending is kept if the content has one.
+
         Args:
             content: The content to apply the patch to, as a string.
             strict: Whether to apply the patch strictly (`True` by default) or to try to find the hunks in the file.
@@ -255,7 +384,63 @@ class UnifiedDiff:
         Returns:
             The patched content as a string.
         """
-        return "\n".join(self.apply(content.splitlines(), strict=strict))
+        lines = content.splitlines()
+        crlf = content.count("\r\n")
+        if content.count("\r") == crlf and (crlf == 0 or content.count("\n") == crlf):
+            # All lines end the same way, so they can simply be joined with that line ending.
+            newline = "\r\n" if crlf else "\n"
+            patched = self.apply(lines, strict=strict)
+            if patched and content.endswith(("\n", "\r")):
+                # An empty last line makes the join emit the trailing line ending without copying the result again.
+                patched.append("")
+            return newline.join(patched)
+        endings = [
+            line[len(stripped):] for line, stripped in zip(content.splitlines(keepends=True), lines, strict=True)
+        ]
+        return _join_with_endings(lines, endings, self.apply(list(lines), strict=strict))
+
+
+def _join_with_endings(lines: Sequence[str], endings: Sequence[str], patched: Sequence[str]) -> str:
+    """Joins patched lines, restoring the line endings of the lines that were left unchanged.
+
+    Args:
+        lines: The original lines, without line endings.
+        endings: The line ending of each original line, the last one may be empty.
+        patched: The patched lines, without line endings.
+
+    Returns:
+        The patched content as a string.
+    """
+    default = collections.Counter(ending for ending in endings if ending).most_common(1)[0][0]
+    patched_endings = []
+    newline = default
+    matcher = difflib.SequenceMatcher(None, lines, patched, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            patched_endings.extend(endings[i1:i2])
+            newline = endings[i2 - 1] or newline
+        else:
+            patched_endings.extend(itertools.repeat(newline, j2 - j1))
+    if patched_endings:
+        # Only the last line may lack a line ending, and only if the original content does.
+        patched_endings[:-1] = [ending or default for ending in patched_endings[:-1]]
+        patched_endings[-1] = (patched_endings[-1] or newline) if endings[-1] else ""
+    return "".join(itertools.chain.from_iterable(zip(patched, patched_endings, strict=True)))
+
+
+def line_index(lines: Sequence[str]) -> dict[str, list[int]]:
+    """Maps each distinct line to the positions where it occurs.
+
+    Args:
+        lines: The lines to index.
+
+    Returns:
+        A dictionary from each line to the list of its (0-indexed) positions in increasing order.
+    """
+    index = {}
+    for position, line in enumerate(lines):
+        index.setdefault(line, []).append(position)
+    return index
 
 
 def apply(diff: UnifiedDiff, from_file: pathlib.Path | None = None, to_file: pathlib.Path | None = None, *,
@@ -272,6 +457,8 @@ def apply(diff: UnifiedDiff, from_file: pathlib.Path | None = None, to_file: pat
         from_file = pathlib.Path(diff.from_file)
     if to_file is None:
         to_file = pathlib.Path(diff.to_file)
-    original_content = from_file.read_text()
+    # Line endings are read and written untranslated, so that the patch preserves them.
+    with from_file.open(newline="") as file:
+        original_content = file.read()
     patched_content = diff(original_content, strict=strict)
-    to_file.write_text(patched_content)
+    to_file.write_text(patched_content, newline="")
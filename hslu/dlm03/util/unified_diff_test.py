@@ -0,0 +1,171 @@
+import random
+
+import pytest
+
+from hslu.dlm03.util import unified_diff
+
+_CONTENT = [f"line {i}" for i in range(1, 11)]
+
+_DIFF = """--- a/file.py
++++ b/file.py
+@@ -2,2 +2,3 @@
+ line 2
+-line 3
++line three
++line 3.5
+@@ -8,2 +9,1 @@
+ line 8
+-line 9
+"""
+
+_EXPECTED = ["line 1", "line 2", "line three", "line 3.5", "line 4", "line 5", "line 6", "line 7", "line 8",
+             "line 10"]
+
+# The second hunk replaces lines that the first hunk already changed.
+_OVERLAPPING_DIFF = """--- a/file.py
++++ b/file.py
+@@ -2,2 +2,2 @@
+ line 2
+-line 3
++line three
+@@ -3,1 +3,1 @@
+-line three
++line 3
+"""
+
+
+@pytest.mark.parametrize("strict", [True, False])
+def test_apply_in_place(strict) -> None:
+    content = list(_CONTENT)
+    patched = unified_diff.UnifiedDiff.from_string(_DIFF).apply(content, strict=strict)
+    assert patched is content
+    assert content == _EXPECTED
+
+
+def test_apply_overlap_in_place() -> None:
+    content = list(_CONTENT)
+    patched = unified_diff.UnifiedDiff.from_string(_OVERLAPPING_DIFF).apply(content)
+    assert patched is content
+    assert content == _CONTENT
+
+
+def test_apply_strict_mismatch_leaves_content() -> None:
+    content = list(_CONTENT)
+    content[8] = "line nine"
+    with pytest.raises(unified_diff.UnifiedDiffError):
+        unified_diff.UnifiedDiff.from_string(_DIFF).apply(content)
+    assert content[:3] == _CONTENT[:3]
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_call_keeps_uniform_line_endings(newline) -> None:
+    content = newline.join(_CONTENT) + newline
+    patched = unified_diff.UnifiedDiff.from_string(_DIFF)(content)
+    assert patched == newline.join(_EXPECTED) + newline
+
+
+def test_call_keeps_mixed_line_endings() -> None:
+    endings = ["\r\n" if i % 3 else "\n" for i in range(len(_CONTENT))]
+    content = "".join(line + ending for line, ending in zip(_CONTENT, endings, strict=True))
+    patched = unified_diff.UnifiedDiff.from_string(_DIFF)(content)
+    assert patched.splitlines() == _EXPECTED
+    # Unchanged lines keep their own line ending, added lines use the one of the line before them.
+    assert patched.splitlines(keepends=True) == [
+        "line 1\n", "line 2\r\n", "line three\r\n", "line 3.5\r\n", "line 4\n", "line 5\r\n", "line 6\r\n",
+        "line 7\n", "line 8\r\n", "line 10\n",
+    ]
+
+
+def test_call_keeps_missing_trailing_line_ending() -> None:
+    content = "line 1\r\nline 2\nline 3"
+    diff = unified_diff.UnifiedDiff.from_string("--- a/f\n+++ b/f\n@@ -3,1 +3,2 @@\n-line 3\n+line three\n+line 4\n")
+    assert diff(content) == "line 1\r\nline 2\nline three\nline 4"
+
+
+def test_apply_file_keeps_crlf(tmp_path) -> None:
+    path = tmp_path / "file.py"
+    path.write_bytes("\r\n".join(_CONTENT).encode() + b"\r\n")
+    unified_diff.apply(unified_diff.UnifiedDiff.from_string(_DIFF), path, path)
+    assert path.read_bytes() == "\r\n".join(_EXPECTED).encode() + b"\r\n"
+
+
+def _reference_apply(content, hunks):
+    """Applies the hunks by splicing them into the content one after the other, as originally implemented."""
+    content = list(content)
+    offset = 0
+    for hunk in hunks:
+        start = hunk.from_line - 1 + offset if hunk.from_count else hunk.from_line + offset
+        assert content[start:start + hunk.from_count] == hunk.before
+        content[start:start + hunk.from_count] = hunk.after
+        offset += hunk.to_count - hunk.from_count
+    return content
+
+
+def _random_hunks(rng, content, num_hunks, max_size):
+    hunks = []
+    cursor = 0
+    offset = 0
+    for _ in range(num_hunks):
+        start = rng.randrange(cursor, len(content) - max_size)
+        end = start + rng.randrange(1, max_size)
+        after = [f"new {rng.random()}" for _ in range(rng.randrange(max_size))]
+        hunks.append(unified_diff.UnifiedDiffHunk(
+            from_line=start + 1, from_count=end - start, to_line=start + 1 + offset, to_count=len(after),
+            before=content[start:end], after=after,
+        ))
+        offset += len(after) - (end - start)
+        cursor = end
+        if cursor >= len(content) - max_size:
+            break
+    return hunks
+
+
+@pytest.mark.parametrize("max_size", [4, 100])
+def test_apply_strict_matches_reference(max_size) -> None:
+    rng = random.Random(max_size)
+    content = [f"line {i}" for i in range(2000)]
+    for _ in range(50):
+        hunks = _random_hunks(rng, content, rng.randrange(1, 8), max_size)
+        diff = unified_diff.UnifiedDiff("a/file.py", "b/file.py", hunks)
+        assert diff.apply(list(content)) == _reference_apply(content, hunks)
+
+
+def test_apply_out_of_order_hunks() -> None:
+    later = unified_diff.UnifiedDiffHunk(
+        from_line=8, from_count=1, to_line=8, to_count=1, before=["line 8"], after=["line eight"],
+    )
+    earlier = unified_diff.UnifiedDiffHunk(
+        from_line=2, from_count=2, to_line=2, to_count=1, before=["line 2", "line 3"], after=["line two"],
+    )
+    content = list(_CONTENT)
+    patched = unified_diff.UnifiedDiff("a/file.py", "b/file.py", [later, earlier]).apply(content)
+    assert patched is content
+    assert patched == _reference_apply(_CONTENT, [later, earlier])
+    assert patched == ["line 1", "line two", "line 4", "line 5", "line 6", "line 7", "line eight", "line 9",
+                       "line 10"]
+
+
+def test_apply_strict_large_hunk_mismatch() -> None:
+    content = [f"line {i}" for i in range(200)]
+    hunk = unified_diff.UnifiedDiffHunk(
+        from_line=11, from_count=100, to_line=11, to_count=1, before=list(content[10:110]), after=["replaced"],
+    )
+    diff = unified_diff.UnifiedDiff("a/file.py", "b/file.py", [hunk])
+    assert diff.apply(list(content)) == [*content[:10], "replaced", *content[110:]]
+    content[60] = "changed"
+    with pytest.raises(unified_diff.UnifiedDiffError):
+        diff.apply(list(content))
+
+
+def test_apply_non_strict_relocates_hunks() -> None:
+    content = ["header 1", "header 2", *_CONTENT]
+    diff = unified_diff.UnifiedDiff.from_string(_DIFF)
+    with pytest.raises(unified_diff.UnifiedDiffError):
+        diff.apply(list(content))
+    assert diff.apply(content, strict=False) == ["header 1", "header 2", *_EXPECTED]
+
+
+def test_apply_non_strict_prefers_stated_position() -> None:
+    content = ["x", "y", "x", "y"]
+    diff = unified_diff.UnifiedDiff.from_string("--- a/f\n+++ b/f\n@@ -3,2 +3,2 @@\n x\n-y\n+z\n")
+    assert diff.apply(content, strict=False) == ["x", "y", "x", "z"]